@@ -0,0 +1 @@
+from .client import ApiClient, get_client
@@ -0,0 +1,73 @@
+import logging, random, time, requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+
+# (подключение, чтение) в секундах
+TIMEOUT = (3.05, 30)
+RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+POOL_SIZE = 10
+# Ответы, после которых запрос повторяется: сервер перегружен или ещё запускается
+RETRY_STATUSES = {502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+class ApiClient:
+    """Общий HTTP-клиент фронтендов: пул keep-alive соединений, таймауты, повторы с экспоненциальной задержкой и параллельные запросы."""
+
+    def __init__(self, base_url: str, timeout=TIMEOUT, retries: int = RETRIES, backoff: float = BACKOFF_BASE,
+                 max_backoff: float = BACKOFF_MAX, pool_size: int = POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='api-client')
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def backoff_delay(self, attempt: int) -> float:
+        # Полный jitter: случайная задержка от 0 до base * 2^attempt, чтобы клиенты не повторяли запросы одновременно
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.request(method, self.url(path), **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                logger.warning(f"API вернул {response.status_code} для {path}, повтор запроса")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Ошибка подключения к API ({path}), повтор запроса\n{str(e)}")
+            time.sleep(self.backoff_delay(attempt))
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+    def gather(self, *functions) -> list:
+        # Независимые вызовы выполняются параллельно; результаты возвращаются в порядке functions.
+        # Внутри функций не вызываются элементы streamlit: у потоков пула нет контекста страницы
+        futures = [self.executor.submit(function) for function in functions]
+        return [future.result() for future in futures]
+
+
+@lru_cache(maxsize=None)
+def get_client(base_url: str) -> ApiClient:
+    # Streamlit перезапускает скрипт страницы при каждом действии, а импортированный модуль - нет:
+    # клиент и его пул соединений живут всё время работы процесса
+    return ApiClient(base_url)
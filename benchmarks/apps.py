@@ -0,0 +1,9 @@
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from model_serving import create_app
+
+
+# Фабрики для uvicorn --factory: у модели hot_dog нет собственного api.py
+def hot_dog():
+    return create_app('hot_dog')
@@ -0,0 +1,44 @@
+import argparse, json
+
+
+def result_key(result: dict) -> tuple:
+    return result['service'], result['scenario'], result['target_rps']
+
+
+def change(old, new) -> str:
+    if old is None or new is None or old == 0:
+        return ''
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def compare(baseline: dict, current: dict):
+    # Сравнение двух запусков (например, до и после коммита) по совпадающим сервису, сценарию и частоте
+    baseline_results = {result_key(result): result for result in baseline['results']}
+    print(f'Базовый запуск: {baseline.get("commit")}, текущий: {current.get("commit")}')
+    print(f'{"сервис/сценарий":<40}{"rps":>6}{"p50, мс":>18}{"p99, мс":>18}{"пропускная, rps":>22}')
+    for result in current['results']:
+        old = baseline_results.get(result_key(result))
+        if old is None:
+            continue
+        name = f'{result["service"]}/{result["scenario"]}'
+        p50 = f'{result["latency_ms"]["p50"] or 0:.1f} {change(old["latency_ms"]["p50"], result["latency_ms"]["p50"])}'
+        p99 = f'{result["latency_ms"]["p99"] or 0:.1f} {change(old["latency_ms"]["p99"], result["latency_ms"]["p99"])}'
+        throughput = f'{result["throughput_rps"]:.1f} {change(old["throughput_rps"], result["throughput_rps"])}'
+        print(f'{name:<40}{result["target_rps"]:>6g}{p50:>18}{p99:>18}{throughput:>22}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение двух JSON-результатов python -m benchmarks.run')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    args = parser.parse_args()
+
+    with open(args.baseline, 'r') as file:
+        baseline = json.load(file)
+    with open(args.current, 'r') as file:
+        current = json.load(file)
+    compare(baseline, current)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import csv, glob, os, numpy as np
+from PIL import Image, ImageDraw, ImageOps
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+HOT_DOG_IMAGES = [
+    os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'hot_dog_validation', '*.jpg'),
+    os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'not_hot_dog_validation', '*.jpg')
+]
+CAR_IMAGES = [
+    os.path.join(REPO_ROOT, 'teachable_machine', 'second_task', f'{name}_test', '*') for name in ('2107', 'Granta', 'Niva')
+]
+CANVAS_SIZE = (284, 284)
+DIGIT_SIZE = (28, 28)
+
+
+def image_files(patterns: list, count: int, rng) -> list:
+    paths = sorted(path for pattern in patterns for path in glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f'Нет изображений по шаблонам {patterns}')
+    chosen = rng.choice(len(paths), size=min(count, len(paths)), replace=False)
+    files = []
+    for idx in sorted(chosen):
+        with open(paths[idx], 'rb') as file:
+            files.append((os.path.basename(paths[idx]), file.read()))
+    return files
+
+
+def image_requests(patterns: list, field: str, count: int, rng) -> list:
+    # Загрузка файла с типом image/*, как из streamlit file_uploader
+    return [
+        {'method': 'POST', 'files': {field: (name, data, 'image/png' if name.lower().endswith('.png') else 'image/jpeg')}}
+        for name, data in image_files(patterns, count, rng)
+    ]
+
+
+def synthetic_canvas(rng) -> Image.Image:
+    # Белые штрихи на прозрачном холсте 284x284, как рисунок в streamlit-drawable-canvas
+    canvas = Image.new('RGBA', CANVAS_SIZE)
+    draw = ImageDraw.Draw(canvas)
+    points = [tuple(point) for point in rng.integers(40, CANVAS_SIZE[0] - 40, size=(int(rng.integers(3, 7)), 2)).tolist()]
+    draw.line(points, fill=(255, 255, 255, 255), width=int(rng.integers(12, 30)), joint='curve')
+    return canvas
+
+
+def digit_requests(count: int, rng, upload_format: str) -> list:
+    requests = []
+    for _ in range(count):
+        canvas = synthetic_canvas(rng)
+        if upload_format == 'canvas':
+            requests.append({'method': 'POST', 'files': {'image': canvas.tobytes()}})
+            continue
+        # Тот же формат, что отправляет клиент neural_networks/App/main.py в режиме compact
+        pixels = np.asarray(ImageOps.fit(canvas.convert('L'), DIGIT_SIZE, Image.Resampling.LANCZOS), dtype=np.uint8)
+        requests.append({'method': 'POST', 'files': {'image': pixels.tobytes()}, 'headers': {'X-Image-Shape': ','.join(map(str, pixels.shape))}})
+    return requests
+
+
+def real_estate_features(rng, city_ids: list, county_ids: list, district_ids: list) -> dict:
+    return {
+        'size': float(rng.uniform(40, 300)),
+        'start_season': int(rng.integers(1, 5)),
+        'end_season': int(rng.integers(1, 5)),
+        'price_currency_id': int(rng.integers(1, 5)),
+        'heating_type_id': int(rng.integers(1, 17)),
+        'building_age_id': int(rng.integers(1, 15)),
+        'city_id': int(rng.choice(city_ids)),
+        'county_id': int(rng.choice(county_ids)),
+        'district_id': int(rng.choice(district_ids)),
+        'bedroom_count': int(rng.integers(1, 6)),
+        'living_room_count': int(rng.integers(0, 3)),
+        'floor_no_id': int(rng.integers(1, 37)),
+        'tom': int(rng.integers(0, 180)),
+        'listing_type': int(rng.integers(1, 3))
+    }
+
+
+def lookup_ids(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as file:
+        return [int(row['id']) for row in csv.DictReader(file)] or [1]
+
+
+def real_estate_requests(count: int, rng, endpoint: str) -> list:
+    # endpoint: price - PricePredictionRequest (с sub_type_id), subtype - SubtypePredictionRequest (с price)
+    homes = os.path.join(REPO_ROOT, 'turkish_real_state', 'homes')
+    city_ids = lookup_ids(os.path.join(homes, 'df_city.csv'))
+    county_ids = lookup_ids(os.path.join(homes, 'df_county.csv'))
+    district_ids = lookup_ids(os.path.join(homes, 'df_district.csv'))
+
+    requests = []
+    for _ in range(count):
+        features = real_estate_features(rng, city_ids, county_ids, district_ids)
+        if endpoint == 'subtype':
+            features['price'] = float(rng.uniform(1e5, 1e7))
+        else:
+            features['sub_type_id'] = int(rng.integers(1, 4))
+        requests.append({'method': 'POST', 'json': features})
+    return requests
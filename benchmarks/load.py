@@ -0,0 +1,118 @@
+import threading, time, numpy as np, requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+
+class RssSampler:
+    """Периодическое чтение RSS процесса сервиса из /proc во время нагрузки."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def read(self) -> dict:
+        values = {}
+        try:
+            with open(f'/proc/{self.pid}/status', 'r') as file:
+                for line in file:
+                    if line.startswith(('VmRSS:', 'VmHWM:')):
+                        name, value = line.split(':')
+                        values[name] = int(value.split()[0]) / 1024
+        except OSError:
+            pass
+        return values
+
+    def run(self):
+        while not self.stopped.is_set():
+            rss = self.read().get('VmRSS')
+            if rss is not None:
+                self.samples.append(rss)
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        self.start_rss = self.read().get('VmRSS')
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
+
+    def stats(self) -> dict:
+        end = self.read()
+        return {
+            'start': self.start_rss,
+            'peak': max(self.samples) if self.samples else None,
+            'end': end.get('VmRSS'),
+            'high_water_mark': end.get('VmHWM')
+        }
+
+
+class LoadGenerator:
+    """Нагрузка с фиксированной частотой (open loop): запрос i отправляется в момент start + i / rate независимо от ответов.
+
+    Задержка считается от запланированного момента отправки, поэтому ожидание свободного клиента при перегрузке
+    тоже входит в p95/p99 и не маскирует медленный сервис (coordinated omission).
+    """
+
+    def __init__(self, base_url: str, concurrency: int, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def session(self) -> requests.Session:
+        if not hasattr(self.local, 'session'):
+            session = requests.Session()
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self.local.session = session
+        return self.local.session
+
+    def send(self, request: dict, scheduled: float) -> tuple:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        request = dict(request)
+        method, path = request.pop('method'), request.pop('path')
+        try:
+            response = self.session().request(method, f'{self.base_url}{path}', timeout=self.timeout, **request)
+            # API недвижимости сообщает об ошибках (например, не загружена модель) телом {"error": ...} с кодом 200
+            ok = response.status_code < 400 and not response.content.startswith(b'{"error"')
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - scheduled, ok, time.perf_counter()
+
+    def warmup(self, requests_list: list, count: int):
+        for request in requests_list[:count]:
+            self.send(request, time.perf_counter())
+
+    def run(self, requests_list: list, rate: float, duration: float) -> dict:
+        total = max(int(rate * duration), 1)
+        start = time.perf_counter() + 0.1
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [
+                executor.submit(self.send, requests_list[idx % len(requests_list)], start + idx / rate)
+                for idx in range(total)
+            ]
+            results = [future.result() for future in futures]
+
+        latencies = np.array([latency for latency, ok, _ in results if ok]) * 1000
+        finished = max(done for _, _, done in results)
+        ok_count = len(latencies)
+        return {
+            'requests': total,
+            'ok': ok_count,
+            'errors': total - ok_count,
+            'target_rps': rate,
+            'throughput_rps': ok_count / (finished - start),
+            'latency_ms': {
+                'mean': float(latencies.mean()) if ok_count else None,
+                'p50': float(np.percentile(latencies, 50)) if ok_count else None,
+                'p95': float(np.percentile(latencies, 95)) if ok_count else None,
+                'p99': float(np.percentile(latencies, 99)) if ok_count else None,
+                'max': float(latencies.max()) if ok_count else None
+            }
+        }
@@ -0,0 +1,93 @@
+import argparse, json, os, platform, subprocess, sys, time, numpy as np
+from .services import SERVICES, RunningService
+from .load import LoadGenerator, RssSampler
+from .fixtures import REPO_ROOT
+from .compare import compare
+
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def parse_env(items: list) -> dict:
+    return dict(item.split('=', 1) for item in items)
+
+
+def run_service(name: str, args) -> list:
+    results = []
+    rng = np.random.default_rng(args.seed)
+    with RunningService(name, SERVICES[name], os.path.join(RESULTS_DIR, 'logs'), parse_env(args.env)) as service:
+        print(f'{name}: запущен за {service.startup_seconds:.1f} с ({service.base_url})', file=sys.stderr)
+        scenarios = service.service.scenarios(service.base_url, args.fixtures, rng)
+        generator = LoadGenerator(service.base_url, args.concurrency, args.timeout)
+
+        for scenario, requests_list in scenarios.items():
+            if args.scenarios and scenario not in args.scenarios:
+                continue
+            generator.warmup(requests_list, args.warmup)
+            for rate in args.rates:
+                with RssSampler(service.process.pid) as sampler:
+                    result = generator.run(requests_list, rate, args.duration)
+                result = {'service': name, 'scenario': scenario, 'startup_s': service.startup_seconds, **result, 'rss_mb': sampler.stats()}
+                results.append(result)
+                latency = result['latency_ms']
+                print(
+                    f'{name}/{scenario} @ {rate:g} rps: {result["throughput_rps"]:.1f} rps, '
+                    f'p50 {latency["p50"] or 0:.1f} мс, p95 {latency["p95"] or 0:.1f} мс, p99 {latency["p99"] or 0:.1f} мс, '
+                    f'ошибок {result["errors"]}, RSS {result["rss_mb"]["peak"] or 0:.0f} МБ',
+                    file=sys.stderr
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование API репозитория: каждый сервис запускается на localhost и получает запросы с фиксированной частотой')
+    parser.add_argument('services', nargs='*', default=list(SERVICES), choices=list(SERVICES))
+    parser.add_argument('--scenarios', nargs='*', default=None, help='только указанные сценарии')
+    parser.add_argument('--rates', nargs='+', type=float, default=[5, 20, 50], help='частоты запросов в секунду')
+    parser.add_argument('--duration', type=float, default=10, help='длительность каждого прогона, с')
+    parser.add_argument('--concurrency', type=int, default=32, help='одновременных клиентов')
+    parser.add_argument('--fixtures', type=int, default=50, help='сколько разных входных данных на сценарий')
+    parser.add_argument('--warmup', type=int, default=5, help='запросов прогрева перед сценарием')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--env', nargs='*', default=[], help='переменные окружения сервисов, например MODEL_BACKEND=tflite')
+    parser.add_argument('--output', default=None, help=f'JSON с результатами (по умолчанию {RESULTS_DIR}/<коммит>.json)')
+    parser.add_argument('--compare', default=None, help='JSON предыдущего запуска для сравнения')
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': []
+    }
+    for name in args.services:
+        try:
+            report['results'].extend(run_service(name, args))
+        except (RuntimeError, TimeoutError, FileNotFoundError) as e:
+            print(f'{name}: пропущен - {e}', file=sys.stderr)
+            report.setdefault('skipped', {})[name] = str(e)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f'Результаты: {output}', file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            compare(json.load(file), report)
+
+
+if __name__ == '__main__':
+    main()
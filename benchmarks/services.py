@@ -0,0 +1,129 @@
+import os, socket, subprocess, sys, time, requests
+from dataclasses import dataclass, field
+from urllib.parse import quote
+from .fixtures import REPO_ROOT, HOT_DOG_IMAGES, CAR_IMAGES, image_requests, digit_requests, real_estate_requests
+
+READY_TIMEOUT = 900
+BATCH_SIZE = 32
+
+
+def with_path(path: str, requests_list: list) -> list:
+    return [{**request, 'path': path} for request in requests_list]
+
+
+def digit_scenarios(base_url: str, count: int, rng) -> dict:
+    return {
+        'predict_canvas': with_path('/predict', digit_requests(count, rng, 'canvas')),
+        'predict_compact': with_path('/predict', digit_requests(count, rng, 'compact'))
+    }
+
+
+def car_scenarios(base_url: str, count: int, rng) -> dict:
+    return {'get_predict': with_path('/get_predict', image_requests(CAR_IMAGES, 'file', count, rng))}
+
+
+def hot_dog_scenarios(base_url: str, count: int, rng) -> dict:
+    return {'get_predict': with_path('/get_predict', image_requests(HOT_DOG_IMAGES, 'file', count, rng))}
+
+
+def kino_scenarios(base_url: str, count: int, rng) -> dict:
+    # Идентификаторы пользователей и названия фильмов выбираются из данных запущенного сервиса
+    users_id = requests.get(f'{base_url}/get_users_id/', timeout=60).json()
+    titles = requests.get(f'{base_url}/get_name_films/', timeout=60).json()
+    users_id = rng.choice(users_id, size=min(count, len(users_id)), replace=False).tolist()
+    titles = rng.choice(titles, size=min(count, len(titles)), replace=False).tolist()
+    return {
+        'popularite_films': [{'method': 'GET', 'path': '/get_popularite_films'}],
+        'favorite_films_knn': [{'method': 'GET', 'path': f'/get_favorite_films/{user_id}'} for user_id in users_id],
+        'favorite_films_svd': [{'method': 'GET', 'path': f'/get_favorite_films/{user_id}?engine=svd'} for user_id in users_id],
+        'same_films_correlation': [{'method': 'GET', 'path': f'/get_same_films_by_name/{quote(title, safe="")}'} for title in titles],
+        'user_profile': [{'method': 'GET', 'path': f'/get_user_profile/{user_id}'} for user_id in users_id]
+    }
+
+
+def real_estate_scenarios(base_url: str, count: int, rng) -> dict:
+    price = real_estate_requests(count, rng, 'price')
+    subtype = real_estate_requests(count, rng, 'subtype')
+    price_batches = [
+        {'method': 'POST', 'path': '/predict/price/batch', 'json': [request['json'] for request in price[start:start + BATCH_SIZE]]}
+        for start in range(0, len(price), BATCH_SIZE)
+    ]
+    return {
+        'districts': [{'method': 'GET', 'path': '/districts'}],
+        'predict_price': with_path('/predict/price', price),
+        'predict_subtype': with_path('/predict/subtype', subtype),
+        'predict_price_batch': price_batches
+    }
+
+
+@dataclass
+class Service:
+    cwd: str
+    app: str
+    ready_path: str
+    scenarios: object
+    factory: bool = False
+    # Кеш предсказаний по содержимому выключен: повторяющиеся фикстуры иначе измеряли бы попадания в кеш
+    env: dict = field(default_factory=lambda: {'PREDICTION_CACHE_SIZE': '0'})
+
+
+SERVICES = {
+    'digit': Service(os.path.join('neural_networks', 'App'), 'api:app', '/stats', digit_scenarios),
+    'car': Service(os.path.join('teachable_machine', 'fourth_task'), 'api:app', '/stats', car_scenarios),
+    'hot_dog': Service('.', 'benchmarks.apps:hot_dog', '/stats', hot_dog_scenarios, factory=True),
+    'kino': Service(os.path.join('recomendation_system_kino', 'App'), 'api:app', '/get_genre_films/', kino_scenarios),
+    'real_estate': Service(os.path.join('turkish_real_state', 'homes'), 'main:app', '/health', real_estate_scenarios)
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class RunningService:
+    """Сервис, запущенный через uvicorn на localhost в отдельном процессе из своей папки (пути к данным в приложениях относительные)."""
+
+    def __init__(self, name: str, service: Service, log_dir: str, extra_env: dict | None = None):
+        self.name = name
+        self.service = service
+        self.port = free_port()
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_path = os.path.join(log_dir, f'{name}.log')
+        self.extra_env = extra_env or {}
+
+    def __enter__(self):
+        command = [sys.executable, '-m', 'uvicorn', self.service.app, '--host', '127.0.0.1', '--port', str(self.port), '--log-level', 'warning']
+        if self.service.factory:
+            command.append('--factory')
+        env = {**os.environ, **self.service.env, **self.extra_env}
+        self.log = open(self.log_path, 'w')
+        start = time.perf_counter()
+        self.process = subprocess.Popen(command, cwd=os.path.join(REPO_ROOT, self.service.cwd), env=env, stdout=self.log, stderr=subprocess.STDOUT)
+        self.wait_ready()
+        self.startup_seconds = time.perf_counter() - start
+        return self
+
+    def wait_ready(self):
+        deadline = time.perf_counter() + READY_TIMEOUT
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'Сервис {self.name} завершился при запуске, см. {self.log_path}')
+            try:
+                if requests.get(f'{self.base_url}{self.service.ready_path}', timeout=5).status_code == 200:
+                    return
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.5)
+        raise TimeoutError(f'Сервис {self.name} не запустился за {READY_TIMEOUT} с, см. {self.log_path}')
+
+    def __exit__(self, *args):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
@@ -0,0 +1,3 @@
+from .config import MODELS
+from .runtime import ModelRuntime
+from .app import create_app
@@ -0,0 +1,90 @@
+import os, numpy as np
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+from service_metrics import instrument, stage_timer
+from .config import MODELS
+from .runtime import ModelRuntime
+from .preprocessing import parse_shape
+from .cache import PredictionCache, PREDICTION_CACHE_DIR
+
+
+class SortedTable(BaseModel):
+    labels: list[str] = Field(alias='Классы')
+    probabilities: list[float] = Field(alias='Процент схожести')
+
+
+class LabelsStr(BaseModel):
+    labels: list[str] = Field(alias='Классы')
+    probabilities: list[str] = Field(alias='Процент схожести')
+
+
+RESPONSE_MODELS = {
+    'sorted_table': SortedTable,
+    'labels_str': LabelsStr
+}
+
+
+def format_response(response: str, labels: np.ndarray, probabilities: np.ndarray) -> dict:
+    if response == 'sorted_table':
+        # Классы по убыванию вероятности через argsort, без DataFrame на каждый запрос
+        order = np.argsort(-probabilities, kind='stable')
+        return {
+            'Классы' : labels[order].tolist(),
+            'Процент схожести' : probabilities[order].tolist()
+        }
+    if response == 'labels_str':
+        return {
+            'Классы' : labels.tolist(),
+            'Процент схожести' : [str(pred) for pred in probabilities]
+        }
+    raise ValueError(f'Неизвестный формат ответа: {response}')
+
+
+def create_app(model_name: str) -> FastAPI:
+    config = MODELS[model_name]
+    cache = PredictionCache(path=os.path.join(PREDICTION_CACHE_DIR, f'{model_name}.pkl') if PREDICTION_CACHE_DIR else None)
+    runtime = ModelRuntime(config, cache=cache, name=model_name)
+
+    labels = np.asarray(runtime.labels)
+
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.state.runtime = runtime
+    instrument(app)
+
+    @app.on_event("startup")
+    async def startup_event():
+        await runtime.start()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        await runtime.stop()
+
+    response_model = RESPONSE_MODELS[config['response']]
+
+    @app.post(config['route'], response_model=response_model)
+    async def predict(image: UploadFile = File(..., alias=config['upload_field']), x_image_shape: str | None = Header(None)):
+        bytes_image = await image.read()
+        encoding = None
+        if x_image_shape:
+            # Сырые uint8-пиксели заданной формы (например, уже уменьшенный клиентом холст 28x28)
+            try:
+                encoding = parse_shape(x_image_shape)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if len(bytes_image) != np.prod(encoding):
+                raise HTTPException(status_code=400, detail=f'Размер данных {len(bytes_image)} не совпадает с формой {encoding}')
+        elif (image.content_type or '').startswith('image/'):
+            encoding = 'image_file'
+
+        probabilities = await runtime.predict(bytes_image, encoding)
+        # Ответ собирается здесь, а не в FastAPI, чтобы сериализация попала в метрики этапов
+        with stage_timer(model_name, 'serialize'):
+            content = response_model.model_validate(format_response(config['response'], labels, probabilities))
+            return ORJSONResponse(content.model_dump(mode='json', by_alias=True))
+
+    @app.get('/stats')
+    async def stats():
+        return runtime.stats()
+
+    return app
@@ -0,0 +1,92 @@
+import asyncio, os, time, numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '32'))
+MAX_WAIT_MS = float(os.getenv('MAX_WAIT_MS', '5'))
+STATS_WINDOW = 10000
+
+
+class MicroBatcher:
+    """Собирает одновременные запросы в один пакет (до max_batch_size штук или max_wait_ms ожидания)
+    и выполняет один прямой проход модели в отдельном потоке, не блокируя цикл событий."""
+
+    def __init__(self, predict_batch, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model')
+        self.queue = None
+        self.worker = None
+        self.latencies = deque(maxlen=STATS_WINDOW)
+        self.batch_sizes = deque(maxlen=STATS_WINDOW)
+        self.requests = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, item) -> np.ndarray:
+        # item - один запрос; predict_batch получает список запросов пакета и возвращает результат
+        # (или исключение) для каждого из них
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        prediction = await future
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += 1
+        return prediction
+
+    async def collect_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.collect_batch()
+            self.batch_sizes.append(len(batch))
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.predict_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), prediction in zip(batch, predictions):
+                if future.done():
+                    continue
+                if isinstance(prediction, Exception):
+                    future.set_exception(prediction)
+                else:
+                    future.set_result(prediction)
+
+    def stats(self) -> dict:
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'requests': self.requests,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'latency_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None
+        }
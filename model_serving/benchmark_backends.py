@@ -0,0 +1,97 @@
+import time
+START = time.perf_counter()
+
+import argparse, json, os, resource, subprocess, sys, numpy as np
+from PIL import Image
+from .config import MODELS, REPO_ROOT, exported_path, calibration_files
+
+BACKENDS = ['keras', 'tflite', 'tflite-int8']
+
+
+def fixture_bytes(config: dict) -> bytes:
+    files = calibration_files(config)
+    if files:
+        with open(files[0], 'rb') as file:
+            return file.read()
+    # Холст для цифры: белая вертикальная черта на прозрачном фоне
+    spec = config['preprocessing']
+    canvas = Image.new(spec['canvas_mode'], spec['canvas_size'])
+    width, height = spec['canvas_size']
+    canvas.paste((255, 255, 255, 255), (width // 2 - 10, height // 5, width // 2 + 10, height * 4 // 5))
+    return canvas.tobytes()
+
+
+def current_rss_mb() -> float:
+    with open('/proc/self/statm', 'r') as file:
+        return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def run_worker(model_name: str, backend: str, requests: int) -> dict:
+    from .runtime import ModelRuntime
+    from .preprocessing import preprocess
+
+    config = MODELS[model_name]
+    runtime = ModelRuntime(config, backend)
+    cold_start = time.perf_counter() - START
+
+    data = preprocess(fixture_bytes(config), config['preprocessing'])
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        runtime.forward(data)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+
+    return {
+        'model': model_name,
+        'backend': backend,
+        'cold_start_s': cold_start,
+        'model_load_s': runtime.load_time,
+        'rss_mb': current_rss_mb(),
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'tensorflow_imported': 'tensorflow' in sys.modules,
+        'latency_p50_ms': float(np.percentile(timings, 50)),
+        'latency_p99_ms': float(np.percentile(timings, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение холодного старта, памяти и задержки Keras и TFLite')
+    parser.add_argument('models', nargs='*', default=['digit', 'car', 'hot_dog'])
+    parser.add_argument('--backends', nargs='*', default=BACKENDS, choices=BACKENDS)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    parser.add_argument('--worker', nargs=2, metavar=('MODEL', 'BACKEND'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker, args.requests)))
+        return
+
+    results = []
+    for model_name in args.models:
+        for backend in args.backends:
+            if backend != 'keras' and not os.path.exists(exported_path(MODELS[model_name], backend)):
+                print(f'{model_name}/{backend}: нет экспортированной модели, запустите python -m model_serving.export --quantize')
+                continue
+            # Каждая комбинация - в отдельном процессе, чтобы честно мерить холодный старт и память
+            process = subprocess.run(
+                [sys.executable, '-m', 'model_serving.benchmark_backends', '--worker', model_name, backend, '--requests', str(args.requests)],
+                cwd=REPO_ROOT, capture_output=True, text=True
+            )
+            if process.returncode != 0:
+                print(f'{model_name}/{backend}: ошибка\n{process.stderr[-2000:]}')
+                continue
+            results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    print(f'{"модель":<12}{"бэкенд":<13}{"старт, с":>10}{"RSS, МБ":>10}{"p50, мс":>10}{"p99, мс":>10}')
+    for result in results:
+        print(f'{result["model"]:<12}{result["backend"]:<13}{result["cold_start_s"]:>10.2f}{result["max_rss_mb"]:>10.0f}{result["latency_p50_ms"]:>10.2f}{result["latency_p99_ms"]:>10.2f}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse, time, numpy as np, pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from .config import MODELS
+from .runtime import load_labels
+from .app import format_response, RESPONSE_MODELS
+
+
+def dataframe_response(response: str, labels: list, probabilities: np.ndarray) -> bytes:
+    # Прежний путь: DataFrame на каждый запрос и универсальная сериализация FastAPI
+    if response == 'sorted_table':
+        content = pd.DataFrame({
+            'Классы' : labels,
+            'Процент схожести' : [float(pred) for pred in probabilities]
+        }).sort_values(by=['Процент схожести'], ascending=False)
+    else:
+        content = {
+            'Классы' : labels,
+            'Процент схожести' : [str(pred) for pred in probabilities]
+        }
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def typed_response(response: str, labels: np.ndarray, probabilities: np.ndarray) -> bytes:
+    # Новый путь: argsort по массиву, проверка моделью ответа и orjson
+    content = RESPONSE_MODELS[response].model_validate(format_response(response, labels, probabilities))
+    return ORJSONResponse(content.model_dump(mode='json', by_alias=True)).body
+
+
+def measure(function, arguments: list) -> tuple[float, float]:
+    timings = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(*argument)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1e6
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Накладные расходы на формирование ответа: DataFrame + JSONResponse против NumPy + ORJSONResponse')
+    parser.add_argument('models', nargs='*', default=['digit', 'car'])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f'{"модель":<12}{"путь":<12}{"p50, мкс":>10}{"p99, мкс":>10}')
+    for model_name in args.models:
+        config = MODELS[model_name]
+        labels = load_labels(config['labels'], config['labels_format'])
+        probabilities = rng.dirichlet(np.ones(len(labels)), size=args.requests).astype(np.float32)
+
+        paths = {
+            'dataframe': (dataframe_response, [(config['response'], labels, row) for row in probabilities]),
+            'numpy': (typed_response, [(config['response'], np.asarray(labels), row) for row in probabilities])
+        }
+        for name, (function, arguments) in paths.items():
+            p50, p99 = measure(function, arguments)
+            print(f'{model_name:<12}{name:<12}{p50:>10.1f}{p99:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
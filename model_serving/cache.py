@@ -0,0 +1,80 @@
+import os, time, pickle, hashlib
+from collections import OrderedDict
+
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '1024'))
+PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', '3600'))
+# Папка для сохранения кеша между перезапусками; пустое значение - кеш только в памяти
+PREDICTION_CACHE_DIR = os.getenv('PREDICTION_CACHE_DIR', '')
+
+
+def model_version(path: str, backend: str) -> str:
+    stat = os.stat(path)
+    return f'{backend}:{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}'
+
+
+class PredictionCache:
+    """LRU-кеш предсказаний с ограничением размера и временем жизни записей. Ключ - хеш загруженных байтов и версия модели."""
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_SIZE, ttl: float = PREDICTION_CACHE_TTL, path: str | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    @staticmethod
+    def key(data: bytes, version: str) -> bytes:
+        return hashlib.blake2b(data, digest_size=16, person=b'prediction').digest() + version.encode()
+
+    def get(self, key: bytes):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: bytes, value):
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = (time.time() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as file:
+                entries = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        now = time.time()
+        for key, entry in entries:
+            if entry[0] >= now:
+                self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        path_tmp = f'{self.path}.tmp'
+        with open(path_tmp, 'wb') as file:
+            pickle.dump(list(self.entries.items()), file)
+        os.replace(path_tmp, self.path)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            'cache_entries': len(self.entries),
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_hit_rate': self.hits / requests if requests else 0.0
+        }
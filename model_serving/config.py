@@ -0,0 +1,74 @@
+import os, glob
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# keras - исходная модель через TensorFlow/Keras, tflite / tflite-int8 - экспортированная модель (см. export.py),
+# для которой достаточно зависимостей из model_serving/req-tflite.txt (ai-edge-litert вместо TensorFlow)
+MODEL_BACKEND = os.getenv('MODEL_BACKEND', 'keras')
+
+# Описание моделей репозитория: файл модели, метки классов, предобработка и формат ответа API
+MODELS = {
+    'digit': {
+        'path': os.path.join(REPO_ROOT, 'neural_networks', 'App', 'model', 'modelNN.h5'),
+        'format': 'keras',
+        'labels': os.path.join(REPO_ROOT, 'neural_networks', 'App', 'model', 'class_names.txt'),
+        'labels_format': 'comma',
+        'preprocessing': {'name': 'raw_canvas', 'canvas_size': (284, 284), 'canvas_mode': 'RGBA', 'color_mode': 'L', 'size': (28, 28), 'normalization': 'unit'},
+        'route': '/predict',
+        'upload_field': 'image',
+        'response': 'sorted_table'
+    },
+    'car': {
+        'path': os.path.join(REPO_ROOT, 'teachable_machine', 'fourth_task', 'model', 'keras_model.h5'),
+        'calibration': [os.path.join(REPO_ROOT, 'teachable_machine', 'second_task', 'test_predict_*', '*.png')],
+        'format': 'keras',
+        'labels': os.path.join(REPO_ROOT, 'teachable_machine', 'fourth_task', 'model', 'labels.txt'),
+        'labels_format': 'teachable_machine',
+        'preprocessing': {'name': 'image_file', 'color_mode': 'RGB', 'size': (224, 224), 'normalization': 'symmetric', 'jpeg_draft': True},
+        'route': '/get_predict',
+        'upload_field': 'file',
+        'response': 'labels_str'
+    },
+    'car_second_task': {
+        'path': os.path.join(REPO_ROOT, 'teachable_machine', 'second_task', 'model', 'converted_keras', 'keras_model.h5'),
+        'calibration': [os.path.join(REPO_ROOT, 'teachable_machine', 'second_task', 'test_predict_*', '*.png')],
+        'format': 'keras',
+        'labels': os.path.join(REPO_ROOT, 'teachable_machine', 'second_task', 'model', 'converted_keras', 'labels.txt'),
+        'labels_format': 'teachable_machine',
+        'preprocessing': {'name': 'image_file', 'color_mode': 'RGB', 'size': (224, 224), 'normalization': 'symmetric', 'jpeg_draft': True},
+        'route': '/get_predict',
+        'upload_field': 'file',
+        'response': 'labels_str'
+    },
+    'hot_dog': {
+        'path': os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'models', 'converted_keras', 'keras_model.h5'),
+        'calibration': [os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'test_*', '*.png')],
+        'format': 'keras',
+        'labels': os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'models', 'converted_keras', 'labels.txt'),
+        'labels_format': 'teachable_machine',
+        'preprocessing': {'name': 'image_file', 'color_mode': 'RGB', 'size': (224, 224), 'normalization': 'symmetric', 'jpeg_draft': True},
+        'route': '/get_predict',
+        'upload_field': 'file',
+        'response': 'labels_str'
+    },
+    'hot_dog_savedmodel': {
+        'path': os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'models', 'converted_savedmodel', 'model.savedmodel'),
+        'calibration': [os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'test_*', '*.png')],
+        'format': 'savedmodel',
+        'labels': os.path.join(REPO_ROOT, 'teachable_machine', 'first_task', 'models', 'converted_savedmodel', 'labels.txt'),
+        'labels_format': 'teachable_machine',
+        'preprocessing': {'name': 'image_file', 'color_mode': 'RGB', 'size': (224, 224), 'normalization': 'symmetric', 'jpeg_draft': True},
+        'route': '/get_predict',
+        'upload_field': 'file',
+        'response': 'labels_str'
+    }
+}
+
+
+def exported_path(config: dict, backend: str) -> str:
+    # modelNN.h5 -> modelNN.tflite / modelNN.int8.tflite, рядом с исходной моделью
+    stem = os.path.splitext(config['path'])[0] if config['format'] == 'keras' else config['path'].rstrip(os.sep)
+    return f'{stem}.int8.tflite' if backend == 'tflite-int8' else f'{stem}.tflite'
+
+
+def calibration_files(config: dict) -> list:
+    return sorted(path for pattern in config.get('calibration', []) for path in glob.glob(pattern))
@@ -0,0 +1,66 @@
+import os
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
+
+import argparse, numpy as np
+from .config import MODELS, exported_path, calibration_files
+from .preprocessing import preprocess
+
+
+def create_converter(config: dict):
+    import tensorflow as tf
+    if config['format'] == 'savedmodel':
+        return tf.lite.TFLiteConverter.from_saved_model(config['path'])
+
+    import keras
+    return tf.lite.TFLiteConverter.from_keras_model(keras.models.load_model(config['path'], compile=False))
+
+
+def representative_dataset(config: dict):
+    # Изображения из репозитория для калибровки диапазонов активаций при int8-квантовании
+    files = calibration_files(config)
+
+    def generator():
+        for path in files:
+            with open(path, 'rb') as file:
+                yield [preprocess(file.read(), config['preprocessing']).astype(np.float32)]
+    return generator if files else None
+
+
+def export_model(model_name: str, quantize: bool) -> list:
+    import tensorflow as tf
+    config = MODELS[model_name]
+    exported = []
+
+    converter = create_converter(config)
+    path = exported_path(config, 'tflite')
+    with open(path, 'wb') as file:
+        file.write(converter.convert())
+    exported.append(path)
+
+    if quantize:
+        converter = create_converter(config)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        dataset = representative_dataset(config)
+        if dataset is not None:
+            # Веса и активации в int8, вход и выход остаются float32 - предобработка не меняется
+            converter.representative_dataset = dataset
+        path = exported_path(config, 'tflite-int8')
+        with open(path, 'wb') as file:
+            file.write(converter.convert())
+        exported.append(path)
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Экспорт моделей Keras в TFLite для лёгкого CPU-инференса')
+    parser.add_argument('models', nargs='*', default=[name for name, config in MODELS.items() if config['format'] == 'keras'], help=f'модели из конфига: {", ".join(MODELS)}')
+    parser.add_argument('--quantize', action='store_true', help='дополнительно сохранить int8-квантованную модель (*.int8.tflite)')
+    args = parser.parse_args()
+
+    for model_name in args.models:
+        for path in export_model(model_name, args.quantize):
+            print(f'{model_name}: {path} ({os.path.getsize(path) / 1024:.0f} КБ)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+from io import BytesIO
+from PIL import Image, ImageOps
+
+# Таблицы нормализации uint8 -> float32, совпадающие бит в бит с прежними формулами:
+# unit - float64(x) / 255 с приведением к float32 на входе модели, symmetric - float32(x) / 127.5 - 1
+NORMALIZATION = {
+    'unit': (np.arange(256) / 255).astype(np.float32),
+    'symmetric': (np.arange(256).astype(np.float32) / 127.5) - 1
+}
+# JPEG декодируется сразу в уменьшенном масштабе (draft), но не меньше чем в DRAFT_OVERSAMPLE раз больше целевого размера
+DRAFT_OVERSAMPLE = 2
+
+
+def decode_raw_canvas(bytes_image: bytes, spec: dict) -> Image.Image:
+    # Сырые пиксели холста streamlit-drawable-canvas (image.tobytes())
+    return Image.frombytes(spec['canvas_mode'], spec['canvas_size'], bytes_image).convert(spec['color_mode'])
+
+
+def decode_image_file(bytes_image: bytes, spec: dict) -> Image.Image:
+    # Файл изображения (jpg, png, ...), как в моделях Teachable Machine
+    image = Image.open(BytesIO(bytes_image))
+    if spec.get('jpeg_draft') and image.format == 'JPEG':
+        width, height = spec['size']
+        image.draft(spec['color_mode'], (width * DRAFT_OVERSAMPLE, height * DRAFT_OVERSAMPLE))
+    return image.convert(spec['color_mode'])
+
+
+DECODERS = {
+    'raw_canvas': decode_raw_canvas,
+    'image_file': decode_image_file
+}
+
+
+def parse_shape(header: str) -> tuple:
+    # Заголовок X-Image-Shape: "28,28" или "28x28" (высота, ширина[, каналы]) для сырых uint8-пикселей
+    shape = tuple(int(size) for size in header.lower().replace('x', ',').split(','))
+    if len(shape) not in (2, 3) or min(shape) <= 0:
+        raise ValueError(f'Некорректная форма изображения: {header}')
+    return shape
+
+
+def decode_resized(bytes_image: bytes, spec: dict, encoding=None) -> np.ndarray:
+    # encoding: None - формат из конфига модели, 'image_file' - файл изображения (png, jpg), кортеж - форма сырых uint8-пикселей
+    if isinstance(encoding, tuple):
+        pixels = np.frombuffer(bytes_image, dtype=np.uint8)
+        if pixels.size != np.prod(encoding):
+            raise ValueError(f'Размер данных {pixels.size} не совпадает с формой {encoding}')
+        pixels = pixels.reshape(encoding)
+        if pixels.shape == input_shape(spec):
+            # Клиент уже уменьшил изображение до входа модели - остаётся только нормализация
+            return pixels
+        image = Image.fromarray(pixels).convert(spec['color_mode'])
+    else:
+        image = DECODERS[encoding or spec['name']](bytes_image, spec)
+    return np.asarray(ImageOps.fit(image, spec['size'], Image.Resampling.LANCZOS))
+
+
+def normalize_into(pixels: np.ndarray, spec: dict, out: np.ndarray):
+    np.take(NORMALIZATION[spec['normalization']], pixels, out=out)
+
+
+def preprocess_into(bytes_image: bytes, spec: dict, out: np.ndarray, encoding=None):
+    # Декодирование, ресайз и нормализация сразу в строку предвыделенного float32-буфера пакета
+    normalize_into(decode_resized(bytes_image, spec, encoding), spec, out)
+
+
+def preprocess(bytes_image: bytes, spec: dict, encoding=None) -> np.ndarray:
+    data = np.empty((1, *input_shape(spec)), dtype=np.float32)
+    preprocess_into(bytes_image, spec, data[0], encoding)
+    return data
+
+
+def input_shape(spec: dict) -> tuple:
+    width, height = spec['size']
+    bands = Image.getmodebands(spec['color_mode'])
+    return (height, width) if bands == 1 else (height, width, bands)
@@ -0,0 +1,150 @@
+import os
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
+
+import time, logging, numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from service_metrics import model_load_timer, observe_stage, stage_timer
+from .batching import MicroBatcher, MAX_BATCH_SIZE
+from .preprocessing import decode_resized, normalize_into, input_shape
+from .config import MODEL_BACKEND, exported_path
+from .cache import PredictionCache, model_version
+
+PREPROCESS_WORKERS = int(os.getenv('PREPROCESS_WORKERS', str(os.cpu_count() or 1)))
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def load_labels(path: str, labels_format: str) -> list:
+    with open(path, 'r') as file:
+        if labels_format == 'comma':
+            return file.read().strip().split(',')
+        # Teachable Machine: строки вида "0 2107"
+        return [line.strip().split(' ', 1)[1] for line in file if line.strip()]
+
+
+def load_keras_model(path: str, model_format: str):
+    if model_format == 'keras':
+        from keras.models import load_model as load_h5_model
+        return load_h5_model(path, compile=False).predict_on_batch
+
+    if model_format == 'savedmodel':
+        from keras.layers import TFSMLayer
+        layer = TFSMLayer(path, call_endpoint='serving_default')
+
+        def predict_on_batch(data):
+            outputs = layer(data)
+            if isinstance(outputs, dict):
+                outputs = next(iter(outputs.values()))
+            return np.asarray(outputs)
+        return predict_on_batch
+
+    raise ValueError(f'Неизвестный формат модели: {model_format}')
+
+
+def load_tflite_interpreter(path: str):
+    # Лёгкие рантаймы не тянут за собой TensorFlow целиком; полный TensorFlow - запасной вариант.
+    # Установка для MODEL_BACKEND=tflite / tflite-int8 без TensorFlow: pip install -r model_serving/req-tflite.txt
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+    return Interpreter(model_path=path)
+
+
+def load_tflite_model(path: str):
+    interpreter = load_tflite_interpreter(path)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    output_index = interpreter.get_output_details()[0]['index']
+
+    def predict_on_batch(data):
+        # Размер пакета меняется от вызова к вызову - перевыделяем тензоры только при его изменении
+        if tuple(interpreter.get_input_details()[0]['shape']) != data.shape:
+            interpreter.resize_tensor_input(input_detail['index'], data.shape)
+            interpreter.allocate_tensors()
+        interpreter.set_tensor(input_detail['index'], data.astype(input_detail['dtype'], copy=False))
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
+    return predict_on_batch
+
+
+def load_model(config: dict, backend: str):
+    if backend == 'keras':
+        return load_keras_model(config['path'], config['format'])
+    if backend in ('tflite', 'tflite-int8'):
+        return load_tflite_model(exported_path(config, backend))
+    raise ValueError(f'Неизвестный бэкенд: {backend}')
+
+
+class ModelRuntime:
+    """Загрузка модели по конфигу, прогрев, предобработка и пакетное предсказание через MicroBatcher."""
+
+    def __init__(self, config: dict, backend: str = MODEL_BACKEND, max_batch_size: int = MAX_BATCH_SIZE, preprocess_workers: int = PREPROCESS_WORKERS, cache: PredictionCache | None = None, name: str | None = None):
+        self.config = config
+        self.name = name or os.path.basename(config['path'])
+        self.backend = backend
+        self.cache = cache if cache is not None else PredictionCache()
+        self.model_version = model_version(config['path'] if backend == 'keras' else exported_path(config, backend), backend)
+        self.labels = load_labels(config['labels'], config['labels_format'])
+        # Пакеты обрабатываются по одному в потоке модели, поэтому один буфер на все пакеты
+        self.buffer = np.zeros((max_batch_size, *input_shape(config['preprocessing'])), dtype=np.float32)
+        self.preprocess_pool = ThreadPoolExecutor(max_workers=preprocess_workers, thread_name_prefix='preprocess')
+
+        start = time.perf_counter()
+        with model_load_timer(self.name, logger.info):
+            self.predict_on_batch = load_model(config, backend)
+        self.load_time = time.perf_counter() - start
+
+        self.warmup()
+        self.batcher = MicroBatcher(self.predict_batch, max_batch_size)
+
+    def warmup(self):
+        # Первый вызов модели строит граф - делаем его при запуске, а не на первом запросе
+        self.forward(self.buffer[:1])
+
+    def forward(self, data: np.ndarray) -> np.ndarray:
+        return np.asarray(self.predict_on_batch(data))
+
+    def preprocess_item(self, index: int, item: tuple):
+        bytes_image, encoding = item
+        spec = self.config['preprocessing']
+        try:
+            start = time.perf_counter()
+            pixels = decode_resized(bytes_image, spec, encoding)
+            decoded = time.perf_counter()
+            normalize_into(pixels, spec, self.buffer[index])
+            observe_stage(self.name, 'decode', decoded - start)
+            observe_stage(self.name, 'preprocess', time.perf_counter() - decoded)
+        except Exception as e:
+            return e
+
+    def predict_batch(self, items: list) -> list:
+        # PIL отпускает GIL при декодировании и ресайзе, поэтому изображения пакета готовятся параллельно в пуле потоков
+        errors = list(self.preprocess_pool.map(self.preprocess_item, range(len(items)), items))
+        with stage_timer(self.name, 'forward'):
+            predictions = self.forward(self.buffer[:len(items)])
+        return [error if error is not None else prediction for error, prediction in zip(errors, predictions)]
+
+    async def start(self):
+        await self.batcher.start()
+
+    async def stop(self):
+        await self.batcher.stop()
+        self.preprocess_pool.shutdown(wait=False)
+        self.cache.save()
+
+    async def predict(self, bytes_image: bytes, encoding=None) -> np.ndarray:
+        # Одинаковые изображения (повторная загрузка того же фото или холста) не декодируются и не прогоняются через модель заново
+        key = self.cache.key(bytes_image, f'{self.model_version}:{encoding}')
+        prediction = self.cache.get(key)
+        if prediction is None:
+            prediction = await self.batcher.submit((bytes_image, encoding))
+            self.cache.put(key, prediction)
+        return prediction
+
+    def stats(self) -> dict:
+        return {'backend': self.backend, 'model_version': self.model_version, 'model_load_seconds': self.load_time, **self.batcher.stats(), **self.cache.stats()}
@@ -0,0 +1,109 @@
+import os
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
+
+import argparse, glob, queue, sys, threading, time, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from .config import MODELS, MODEL_BACKEND
+from .preprocessing import decode_resized, normalize_into, input_shape
+from .runtime import load_model, load_labels
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+# Модели с входом raw_canvas (digit) принимают сырые пиксели холста, а не файлы изображений
+IMAGE_FILE_MODELS = [name for name, config in MODELS.items() if config['preprocessing']['name'] == 'image_file']
+
+
+def find_images(inputs: list) -> list:
+    paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths.extend(path for path in glob.glob(pattern, recursive=True) if path.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(set(paths))
+
+
+def decode_file(path: str, spec: dict):
+    # Выполняется в отдельном процессе: возвращает uint8-пиксели нужного размера (в 4 раза меньше float32 для передачи между процессами)
+    try:
+        with open(path, 'rb') as file:
+            return decode_resized(file.read(), spec), None
+    except Exception as e:
+        return None, str(e)
+
+
+def produce(paths: list, spec: dict, batch_size: int, executor: ProcessPoolExecutor, batches: queue.Queue):
+    # Ограниченная очередь: вперёд декодируется не больше prefetch пакетов
+    for start in range(0, len(paths), batch_size):
+        chunk = paths[start:start + batch_size]
+        batches.put((chunk, [executor.submit(decode_file, path, spec) for path in chunk]))
+    batches.put(None)
+
+
+def score(model_name: str, inputs: list, batch_size: int, workers: int, prefetch: int, backend: str, log_every: int = 10) -> pd.DataFrame:
+    config = MODELS[model_name]
+    spec = config['preprocessing']
+    paths = find_images(inputs)
+    if not paths:
+        raise FileNotFoundError(f'Не найдено изображений: {inputs}')
+
+    labels = load_labels(config['labels'], config['labels_format'])
+    predict_on_batch = load_model(config, backend)
+    buffer = np.zeros((batch_size, *input_shape(spec)), dtype=np.float32)
+
+    rows = []
+    batches = queue.Queue(maxsize=prefetch)
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        threading.Thread(target=produce, args=(paths, spec, batch_size, executor, batches), daemon=True).start()
+        batch_number = 0
+        while (batch := batches.get()) is not None:
+            chunk, futures = batch
+            decoded = [future.result() for future in futures]
+            valid = [index for index, (pixels, _) in enumerate(decoded) if pixels is not None]
+            for position, index in enumerate(valid):
+                normalize_into(decoded[index][0], spec, buffer[position])
+            probabilities = np.asarray(predict_on_batch(buffer[:len(valid)])) if valid else np.empty((0, len(labels)))
+
+            # Строки пишутся в порядке найденных файлов, ошибки декодирования - на месте своего файла
+            positions = {index: position for position, index in enumerate(valid)}
+            for index, (pixels, error) in enumerate(decoded):
+                if pixels is None:
+                    rows.append({'path': chunk[index], 'label': None, 'confidence': None, 'error': error})
+                    continue
+                prediction = probabilities[positions[index]]
+                best = int(np.argmax(prediction))
+                rows.append({
+                    'path': chunk[index], 'label': labels[best], 'confidence': float(prediction[best]), 'error': None,
+                    **{f'p_{label}': float(value) for label, value in zip(labels, prediction)}
+                })
+
+            batch_number += 1
+            if batch_number % log_every == 0:
+                print(f'{len(rows)}/{len(paths)} изображений, {len(rows) / (time.perf_counter() - start_time):.1f} изобр./с', file=sys.stderr)
+
+    elapsed = time.perf_counter() - start_time
+    print(f'Готово: {len(rows)} изображений за {elapsed:.1f} с ({len(rows) / elapsed:.1f} изобр./с)', file=sys.stderr)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакетная оценка папок с изображениями моделями репозитория')
+    parser.add_argument('model', choices=IMAGE_FILE_MODELS)
+    parser.add_argument('inputs', nargs='+', help='папки или glob-шаблоны с изображениями')
+    parser.add_argument('--output', required=True, help='файл результатов .csv или .parquet')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='процессов для декодирования')
+    parser.add_argument('--prefetch', type=int, default=4, help='сколько пакетов декодировать наперёд')
+    parser.add_argument('--backend', default=MODEL_BACKEND, choices=['keras', 'tflite', 'tflite-int8'])
+    args = parser.parse_args()
+
+    results = score(args.model, args.inputs, args.batch_size, args.workers, args.prefetch, args.backend)
+    if args.output.endswith('.parquet'):
+        results.to_parquet(args.output, index=False)
+    else:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
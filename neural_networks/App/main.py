@@ -1,40 +1,54 @@
-import requests, streamlit as st, logging, time, pandas as pd
+import requests, streamlit as st, logging, sys, os, pandas as pd, numpy as np
+from io import BytesIO
 from PIL import Image, ImageOps
 from streamlit_drawable_canvas import st_canvas
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from api_client import get_client
 
 API_BASE_URL = "http://127.0.0.1:8000/"
 SIZE_IMAGE_DRAW = (284, 284)
+SIZE_IMAGE_MODEL = (28, 28)
+# compact - уменьшенные клиентом пиксели 28x28 (784 байта), png - то же в PNG, canvas - исходный холст RGBA (~323 КБ)
+UPLOAD_FORMAT = os.getenv('UPLOAD_FORMAT', 'compact')
 
-def request_api(path_to_api: str, files: tuple):
-    trying = 3
+def encode_canvas(image: Image.Image, upload_format: str) -> tuple[dict, dict]:
+    # Уменьшение так же, как на сервере (оттенки серого + LANCZOS), поэтому предсказание не меняется
+    if upload_format == 'canvas':
+        return {'image' : image.tobytes()}, {}
+
+    pixels = ImageOps.fit(image.convert('L'), SIZE_IMAGE_MODEL, Image.Resampling.LANCZOS)
+    if upload_format == 'png':
+        buffer = BytesIO()
+        pixels.save(buffer, format='PNG')
+        return {'image' : ('digit.png', buffer.getvalue(), 'image/png')}, {}
+
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    return {'image' : pixels.tobytes()}, {'X-Image-Shape' : ','.join(map(str, pixels.shape))}
+
+def request_api(path_to_api: str, files: tuple, headers: dict | None = None):
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
     logger = logging.getLogger(__name__)
 
-    url = f"{API_BASE_URL}{path_to_api}"
-    
-    while trying > 0:
-        try:
-            response = requests.post(url, files=files)
+    # Повторы с экспоненциальной задержкой и таймауты - в общем клиенте
+    try:
+        response = get_client(API_BASE_URL).post(path_to_api, files=files, headers=headers)
 
-            return response.json()
+        return response.json()
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка при обращении к API\n{str(e)}")
+    except requests.exceptions.ConnectionError as e:
+        logger.error(f"Ошибка подключения к API\n{str(e)}")
 
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Ошибка подключения к API\n{str(e)}")
-        
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка\n{str(e)}")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Ошибка при обращении к API\n{str(e)}")
 
-        time.sleep(5)
-        trying -= 1
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка\n{str(e)}")
 
 def site():
-    def predict_digit(data):
+    def predict_digit(data, headers):
         with st.spinner("Обработка..."):
-            response = request_api('predict', data)
+            response = request_api('predict', data, headers)
             if response:
                 st.table(response)
                 st.markdown("<style>div.stTable {font-size: 30px;}</style>", unsafe_allow_html=True)
@@ -55,8 +69,8 @@ def site():
         if st.button("Предсказать"):
             image = Image.frombytes('RGBA', SIZE_IMAGE_DRAW, canvas_result.image_data)
         
-            data = {'image' : image.tobytes()}
-            predict_digit(data)
+            data, headers = encode_canvas(image, UPLOAD_FORMAT)
+            predict_digit(data, headers)
 
     def information_page():
         st.html("<h2>Данный проект представляет собой предсказание цифры, по нарисованному пользователем изображением.<br/><h2/>")
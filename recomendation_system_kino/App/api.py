@@ -1,92 +1,326 @@
-from fastapi import FastAPI
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from fastapi import FastAPI, Body, HTTPException
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 from scipy.sparse import csr_matrix
-from sklearn.neighbors import NearestNeighbors
-import uvicorn, pandas as pd
+from similarity_index import SimilarityIndex, URL_SIMILARITY_INDEX
+from user_neighbors import UserNeighbors, URL_USER_NEIGHBORS, replace_rows
+from popularity import WeightedRating
+from dataset_cache import DatasetCache
+from factorization import FactorizationEngine, URL_FACTORIZATION
+from responses import PopularFilms, FavoriteGenres, SameFilms, FavoriteFilms, RatingFilms, UserProfile, AddedRatings, serialize
+from service_metrics import instrument, stage_timer, model_load_timer
+from typing import Literal
+import uvicorn, pandas as pd, numpy as np, threading, logging, json, time
+
+URL_DATASET = 'datasets/df_films_reviews.csv'
+URL_EXTRA_USERS_ID = 'datasets/extra_users_id.json'
+MIN_USER_RATINGS = 1000
+EXTRA_USERS_ID = [222333, 333222]
+COMPACTION_INTERVAL = 300
+RATING_FILMS_COLUMNS = ['title', 'year-production', 'genres', 'rating']
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+class NewRating(BaseModel):
+    userId: int
+    title: str
+    rating: float
 
 class RecomendationSystem:
     def __init__(self):
-        self.df_films_reviews = self.load_dataset()
-        self.users_pivot = self.create_users_pivot(self.df_films_reviews)
-        self.film_df_matrix = self.create_csr_matrix(self.users_pivot)
+        self.lock = threading.RLock()
+        self.extra_users_id = self.load_extra_users_id()
+        self.dataset_cache = DatasetCache(URL_DATASET)
+        self.df_films_reviews, self.index_users, self.user_offsets = self.create_user_index(self.load_dataset())
+        self.pending_reviews = self.df_films_reviews.iloc[0:0]
+        self.persisted_reviews = 0
+        self.film_info = self.create_film_info(self.df_films_reviews)
+        self.pivot_users, self.pivot_titles, self.film_df_matrix = self.create_users_pivot(self.df_films_reviews)
+        self.pivot_user_index = {user_id: idx for idx, user_id in enumerate(self.pivot_users.tolist())}
+        self.pivot_titles_index = pd.Index(self.pivot_titles)
+        self.similarity_index = self.load_similarity_index()
+        self.model_knn = self.load_model_knn()
+        self.factorization = self.load_factorization()
+        self.popularity, self.popularity_by_genre, self.favorite_genres = self.create_popularity(self.df_films_reviews)
+
+    def load_extra_users_id(self) -> list:
+        # Пользователи, оценки которых добавлены через API, попадают в матрицу независимо от количества оценок
+        try:
+            with open(URL_EXTRA_USERS_ID, 'r') as file:
+                added_users_id = json.load(file)
+        except (OSError, ValueError):
+            added_users_id = []
+        return sorted(set(EXTRA_USERS_ID) | set(added_users_id))
+
+    def create_film_info(self, df_films_reviews: pd.DataFrame) -> pd.DataFrame:
+        columns = [column for column in df_films_reviews.columns if column not in ('userId', 'rating') and not column.startswith('Unnamed')]
+        film_info = df_films_reviews[columns].drop_duplicates('title')
+        # Столбцы из кеша категориальные; по одной строке на фильм обычные значения дешевле и совпадают с типами CSV для новых оценок
+        film_info = film_info.astype({column: object for column in columns if isinstance(film_info[column].dtype, pd.CategoricalDtype)})
+        return film_info.set_index('title')
 
     def load_dataset(self) -> pd.DataFrame:
-        return pd.read_csv('datasets/df_films_reviews.csv')
+        df_films_reviews = self.dataset_cache.load_dataset()
+        if df_films_reviews is None:
+            df_films_reviews = pd.read_csv(URL_DATASET)
+            self.dataset_cache.save_dataset(df_films_reviews)
+        return df_films_reviews
+
+    def create_user_index(self, df_films_reviews: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        # Оценки отсортированы по userId: оценки пользователя лежат в строках user_offsets[i]:user_offsets[i + 1]
+        df_films_reviews = df_films_reviews.sort_values('userId', kind='stable').reset_index(drop=True)
+        index_users, starts = np.unique(df_films_reviews['userId'].to_numpy(), return_index=True)
+        return df_films_reviews, index_users, np.append(starts, len(df_films_reviews))
+
+    def user_reviews(self, User_id) -> pd.DataFrame:
+        position = np.searchsorted(self.index_users, User_id)
+        if position == len(self.index_users) or self.index_users[position] != User_id:
+            reviews = self.df_films_reviews.iloc[0:0]
+        else:
+            reviews = self.df_films_reviews.iloc[self.user_offsets[position]:self.user_offsets[position + 1]]
+
+        pending_reviews = self.pending_reviews
+        if not pending_reviews.empty:
+            pending_reviews = pending_reviews[pending_reviews['userId'] == User_id]
+            if not pending_reviews.empty:
+                return pd.concat([reviews, pending_reviews], ignore_index=True)
+        return reviews
+
+    def load_similarity_index(self) -> SimilarityIndex:
+        with model_load_timer('correlation', logger.info):
+            return SimilarityIndex.load_or_build(URL_SIMILARITY_INDEX, self.dataset_cache.signature, self.film_df_matrix, self.pivot_titles)
+
+    def load_model_knn(self) -> UserNeighbors:
+        with model_load_timer('knn', logger.info):
+            return UserNeighbors.load_or_fit(URL_USER_NEIGHBORS, self.dataset_cache.signature, self.film_df_matrix)
+
+    def load_factorization(self) -> FactorizationEngine:
+        with model_load_timer('svd', logger.info):
+            return FactorizationEngine.load_or_fit(URL_FACTORIZATION, self.dataset_cache.signature, self.film_df_matrix)
     
-    def create_users_pivot(self, df_films_reviews: pd.DataFrame) -> pd.DataFrame:
-        new_df = df_films_reviews[(df_films_reviews['userId'].map(df_films_reviews['userId'].value_counts()) > 1000) | (df_films_reviews['userId'] == 222333)| (df_films_reviews['userId'] == 333222)]
-        users_pivot=new_df.pivot_table(index=["userId"],columns=["title"],values="rating")
-        users_pivot.fillna(0,inplace=True)
-        return users_pivot
+    def create_popularity(self, df_films_reviews: pd.DataFrame) -> tuple[WeightedRating, WeightedRating, WeightedRating]:
+        popularity = WeightedRating(df_films_reviews, 'title')
+        popularity_by_genre = WeightedRating(df_films_reviews, 'title', group_by='genres')
+        favorite_genres = WeightedRating(df_films_reviews, 'genres', group_by='userId', max_cached_groups=10000)
+        popularity.precompute()
+        popularity_by_genre.precompute()
+        return popularity, popularity_by_genre, favorite_genres
     
-    def create_csr_matrix(self, users_pivot: pd.DataFrame) -> csr_matrix:
-        return csr_matrix(users_pivot.values)
+    def create_users_pivot(self, df_films_reviews: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, csr_matrix]:
+        pivot_params = {'min_user_ratings': MIN_USER_RATINGS, 'extra_users_id': self.extra_users_id}
+        cached_pivot = self.dataset_cache.load_matrix(pivot_params)
+        if cached_pivot is not None:
+            return cached_pivot
+
+        pivot_users, pivot_titles, film_df_matrix = self.build_users_pivot(df_films_reviews, self.index_users, self.user_offsets, self.extra_users_id)
+        self.dataset_cache.save_matrix(pivot_params, pivot_users, pivot_titles, film_df_matrix)
+        return pivot_users, pivot_titles, film_df_matrix
+
+    def build_users_pivot(self, df_films_reviews: pd.DataFrame, index_users: np.ndarray, user_offsets: np.ndarray, extra_users_id: list) -> tuple[np.ndarray, np.ndarray, csr_matrix]:
+        # Разреженный аналог pivot_table(index='userId', columns='title', values='rating').fillna(0) без плотной таблицы
+        eligible_users = index_users[(np.diff(user_offsets) > MIN_USER_RATINGS) | np.isin(index_users, extra_users_id)]
+        new_df = df_films_reviews[df_films_reviews['userId'].isin(eligible_users)]
+        user_codes, users = pd.factorize(new_df['userId'], sort=True)
+        title_codes, titles = pd.factorize(new_df['title'], sort=True)
+
+        ratings = new_df['rating'].groupby([user_codes, title_codes]).mean()
+        film_df_matrix = csr_matrix(
+            (ratings.to_numpy(dtype=np.float64), (ratings.index.get_level_values(0), ratings.index.get_level_values(1))),
+            shape=(len(users), len(titles))
+        )
+        return np.asarray(users), np.asarray(titles, dtype=object), film_df_matrix
+
+    def add_ratings(self, new_ratings: pd.DataFrame) -> dict:
+        if new_ratings.empty:
+            return {'added': 0}
+
+        unknown_titles = new_ratings.loc[~new_ratings['title'].isin(self.film_info.index), 'title'].unique().tolist()
+        if unknown_titles:
+            raise KeyError(f'Неизвестные фильмы: {unknown_titles}')
+
+        new_reviews = new_ratings.join(self.film_info, on='title').reindex(columns=self.df_films_reviews.columns)
+        with self.lock:
+            self.pending_reviews = pd.concat([self.pending_reviews, new_reviews], ignore_index=True)
+            self.apply_reviews(new_reviews)
+        return {'added': len(new_reviews)}
+
+    def apply_reviews(self, new_reviews: pd.DataFrame):
+        for weighted_rating in (self.popularity, self.popularity_by_genre, self.favorite_genres):
+            weighted_rating.append(new_reviews)
+        users_id = new_reviews['userId'].unique()
+        self.extra_users_id = sorted(set(self.extra_users_id) | set(self.light_users(users_id)))
+        self.update_users_pivot(users_id)
+
+    def light_users(self, users_id: np.ndarray) -> list:
+        # В extra_users_id попадают только пользователи, не проходящие порог MIN_USER_RATINGS, остальные и так есть в матрице
+        positions = np.minimum(np.searchsorted(self.index_users, users_id), len(self.index_users) - 1)
+        found = self.index_users[positions] == users_id
+        counts = np.where(found, np.diff(self.user_offsets)[positions], 0)
+        return users_id[counts <= MIN_USER_RATINGS].tolist()
+
+    def update_users_pivot(self, users_id: np.ndarray):
+        # Строки изменившихся пользователей пересчитываются по всем их оценкам, новые пользователи добавляются в конец матрицы.
+        # Сразу обновляются разреженная матрица, строки KNN и проекции SVD. Индекс похожих фильмов (SimilarityIndex) зависит
+        # от средних по всем пользователям и топ-K всех фильмов, поэтому пересобирается только в compact().
+        # Оценки фильмов, которых ещё нет среди столбцов матрицы, до compact() учитываются лишь в популярности и истории пользователя.
+        reviews = pd.concat([self.user_reviews(user_id) for user_id in users_id], ignore_index=True)
+        user_codes = pd.Index(users_id).get_indexer(reviews['userId'])
+        title_codes = self.pivot_titles_index.get_indexer(reviews['title'])
+        known_titles = title_codes >= 0
+
+        ratings = reviews['rating'][known_titles].groupby([user_codes[known_titles], title_codes[known_titles]]).mean()
+        rows = csr_matrix(
+            (ratings.to_numpy(dtype=np.float64), (ratings.index.get_level_values(0), ratings.index.get_level_values(1))),
+            shape=(len(users_id), len(self.pivot_titles))
+        )
+
+        pivot_user_index = dict(self.pivot_user_index)
+        new_users_id = [user_id for user_id in users_id.tolist() if user_id not in pivot_user_index]
+        for user_id in new_users_id:
+            pivot_user_index[user_id] = len(pivot_user_index)
+        positions = [pivot_user_index[user_id] for user_id in users_id.tolist()]
+
+        self.film_df_matrix = replace_rows(self.film_df_matrix, positions, rows, len(pivot_user_index))
+        self.model_knn.replace_rows(positions, rows, len(pivot_user_index))
+        self.factorization.replace_rows(positions, rows, len(pivot_user_index))
+        self.pivot_users = np.append(self.pivot_users, new_users_id).astype(self.pivot_users.dtype)
+        self.pivot_user_index = pivot_user_index
+
+    def start_compaction(self, interval: int = COMPACTION_INTERVAL):
+        threading.Thread(target=self.compaction_loop, args=(interval,), daemon=True).start()
+
+    def compaction_loop(self, interval: int):
+        while True:
+            time.sleep(interval)
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Ошибка при уплотнении новых оценок\n{str(e)}")
+
+    def flush(self) -> pd.DataFrame:
+        # Ещё не записанные оценки дописываются в CSV, чтобы перезапуск сервиса не потерял уже подтверждённые оценки
+        with self.lock:
+            pending_reviews = self.pending_reviews
+            new_reviews = pending_reviews.iloc[self.persisted_reviews:]
+            if not new_reviews.empty:
+                new_reviews.to_csv(URL_DATASET, mode='a', header=False, index=False)
+                with open(URL_EXTRA_USERS_ID, 'w') as file:
+                    json.dump([user_id for user_id in self.extra_users_id if user_id not in EXTRA_USERS_ID], file)
+                self.persisted_reviews = len(pending_reviews)
+        return pending_reviews
+
+    def compact(self):
+        # Новые оценки дописываются в CSV, после чего в фоне пересобираются датасет, матрица и индексы
+        with self.lock:
+            compacted_reviews = self.flush()
+            df_films_reviews = self.df_films_reviews
+            extra_users_id = list(self.extra_users_id)
+            csv_stat = os.stat(URL_DATASET)
+        if compacted_reviews.empty:
+            return
+
+        dataset_cache = DatasetCache(URL_DATASET, stat=csv_stat)
+        df_films_reviews, index_users, user_offsets = self.create_user_index(pd.concat([df_films_reviews, compacted_reviews], ignore_index=True))
+        dataset_cache.save_dataset(df_films_reviews)
+        pivot_users, pivot_titles, film_df_matrix = self.build_users_pivot(df_films_reviews, index_users, user_offsets, extra_users_id)
+        dataset_cache.save_matrix({'min_user_ratings': MIN_USER_RATINGS, 'extra_users_id': extra_users_id}, pivot_users, pivot_titles, film_df_matrix)
+
+        similarity_index = SimilarityIndex.build(film_df_matrix, pivot_titles)
+        similarity_index.save(URL_SIMILARITY_INDEX, dataset_cache.signature)
+        model_knn = UserNeighbors.fit(film_df_matrix)
+        model_knn.save(URL_USER_NEIGHBORS, dataset_cache.signature)
+        factorization = FactorizationEngine.fit(film_df_matrix)
+        factorization.save(URL_FACTORIZATION, dataset_cache.signature)
+
+        with self.lock:
+            later_reviews = self.pending_reviews.iloc[len(compacted_reviews):]
+            self.dataset_cache = dataset_cache
+            self.film_df_matrix, self.model_knn, self.similarity_index, self.factorization = film_df_matrix, model_knn, similarity_index, factorization
+            self.pivot_titles, self.pivot_titles_index = pivot_titles, pd.Index(pivot_titles)
+            self.pivot_users, self.pivot_user_index = pivot_users, {user_id: idx for idx, user_id in enumerate(pivot_users.tolist())}
+            self.df_films_reviews, self.index_users, self.user_offsets = df_films_reviews, index_users, user_offsets
+            self.pending_reviews = later_reviews.reset_index(drop=True)
+            self.persisted_reviews = max(self.persisted_reviews - len(compacted_reviews), 0)
+            if not later_reviews.empty:
+                self.update_users_pivot(later_reviews['userId'].unique())
+        logger.info(f"Добавлено в датасет новых оценок: {len(compacted_reviews)}")
 
     def popularite_films(self) -> dict:
-        avg_ratings = self.df_films_reviews.groupby('title')['rating'].mean().reset_index().rename(columns={'rating': 'avg_rating'})
-        avg = pd.DataFrame(avg_ratings).sort_values('avg_rating',ascending=False)
-        cnt_ratings = self.df_films_reviews.groupby('title')['rating'].count().reset_index().rename(columns={'rating': 'count_rating'})
-        cnt=pd.DataFrame(cnt_ratings).sort_values('count_rating',ascending=False)
-        popularite=avg.merge(cnt,on='title')
-        v=popularite["count_rating"]
-        R=popularite["avg_rating"]
-        m=v.quantile(0.90)
-        c=R.mean()
-        popularite['w_score']=((v*R) + (m*c)) / (v+m)
-        return popularite.sort_values('w_score',ascending=False).head(10).reset_index()[['title', 'w_score']]
+        return self.popularity.top()
     
-    def popularite_films_by_genre(self, genre: str) -> pd.DataFrame:
-        df = self.df_films_reviews[self.df_films_reviews['genres'] == genre]
-        avg_ratings = df.groupby('title')['rating'].mean().reset_index().rename(columns={'rating': 'avg_rating'})
-        avg = pd.DataFrame(avg_ratings).sort_values('avg_rating',ascending=False)
-        cnt_ratings = df.groupby('title')['rating'].count().reset_index().rename(columns={'rating': 'count_rating'})
-        cnt=pd.DataFrame(cnt_ratings).sort_values('count_rating',ascending=False)
-        popularite=avg.merge(cnt,on='title')
-        v=popularite["count_rating"]
-        R=popularite["avg_rating"]
-        m=v.quantile(0.90)
-        c=R.mean()
-        popularite['w_score']=((v*R) + (m*c)) / (v+m)
-        return popularite.sort_values('w_score',ascending=False).head(10).reset_index()[['title', 'w_score']]
+    def popularite_films_by_genre(self, genre: str) -> dict:
+        return self.popularity_by_genre.top(genre)
     
-    def same_films(self, name_film):
-        users_vote_film=self.users_pivot[name_film]
-        similar_with=self.users_pivot.corrwith(users_vote_film)
-        similar_with = pd.DataFrame({'title' : similar_with.to_dict().keys(), 'correlation' : similar_with.to_dict().values()})
-        df=similar_with.sort_values('correlation',ascending=False).reset_index(drop=True).iloc[1:11]
-        return df
+    def same_films(self, name_film, engine: str = 'correlation'):
+        return self.same_films_batch([name_film], engine, skip_unknown=False)[name_film]
+
+    def same_films_batch(self, names_film, engine: str = 'correlation', skip_unknown: bool = True) -> dict:
+        # Неизвестные фильмы одинаково обрабатываются всеми движками: пропускаются в пакете или вызывают KeyError
+        pivot_titles_index = self.pivot_titles_index
+        columns = pivot_titles_index.get_indexer(names_film)
+        known = columns >= 0
+        if not known.all():
+            if not skip_unknown:
+                raise KeyError(f'Неизвестные фильмы: {[name_film for name_film, is_known in zip(names_film, known) if not is_known]}')
+            names_film, columns = [name_film for name_film, is_known in zip(names_film, known) if is_known], columns[known]
+        if not names_film:
+            return {}
+
+        same_films = {}
+        if engine == 'svd':
+            indices, scores = self.factorization.similar_titles(columns, 10)
+            for name_film, film_indices, film_scores in zip(names_film, indices, scores):
+                same_films[name_film] = {'title' : self.pivot_titles[film_indices].tolist(), 'similarity' : film_scores.tolist()}
+            return same_films
+
+        for name_film in names_film:
+            titles, correlations = self.similarity_index.most_similar(name_film, 10)
+            same_films[name_film] = {'title' : titles.tolist(), 'correlation' : correlations.tolist()}
+        return same_films
     
-    def find_favorite_films(self, User_id, num_books=10):
-        model_knn = NearestNeighbors(metric='cosine', algorithm='brute')
-        model_knn.fit(self.film_df_matrix)
-        
-        user_index = self.users_pivot.index.get_loc(User_id)
-        
-        distances, indices = model_knn.kneighbors(self.film_df_matrix[user_index], n_neighbors=num_books+1)
+    def find_favorite_films(self, User_id, num_books=10, engine: str = 'knn'):
+        return self.find_favorite_films_batch([User_id], num_books, engine, skip_unknown=False)[User_id]
+
+    def find_favorite_films_batch(self, users_id, num_books=10, engine: str = 'knn', skip_unknown: bool = True) -> dict:
+        # Все пользователи считаются одним векторизованным проходом; неизвестные пользователи в пакете пропускаются
+        pivot_user_index = self.pivot_user_index
+        if skip_unknown:
+            users_id = [user_id for user_id in users_id if user_id in pivot_user_index]
+        users_index = [pivot_user_index[user_id] for user_id in users_id]
+        if not users_index:
+            return {}
 
-        favorite_indices = indices[0][1:]
-        favorite_distances = distances[0][1:]
+        favorite_films = {}
+        if engine == 'svd':
+            indices, scores = self.factorization.recommend(users_index, num_books, self.film_df_matrix)
+            for user_id, user_indices, user_scores in zip(users_id, indices, scores):
+                favorite_films[user_id] = {"favorite films ":self.pivot_titles[user_indices].tolist(), "score" : user_scores.tolist()}
+            return favorite_films
 
+        distances, indices = self.model_knn.kneighbors(users_index, n_neighbors=num_books+1)
 
-        list_favorite_films = [self.users_pivot.columns[idx] for idx in favorite_indices]
-        favorite_films=pd.DataFrame({"favorite films ":list_favorite_films, "distances" : favorite_distances})
+        for user_id, user_indices, user_distances in zip(users_id, indices, distances):
+            favorite_films[user_id] = {"favorite films ":self.pivot_titles[user_indices[1:]].tolist(), "distances" : user_distances[1:].tolist()}
         return favorite_films
     
-    def find_rating_films_user(self, User_id):
-        return self.df_films_reviews[self.df_films_reviews['userId'] == User_id][['title', 'year-production', 'genres', 'rating']].sort_values(by='genres')
+    def find_rating_films_user(self, User_id) -> dict:
+        reviews = self.user_reviews(User_id)
+        order = np.argsort(reviews['genres'].to_numpy(dtype=str), kind='stable')
+        return {column : reviews[column].to_numpy()[order].tolist() for column in RATING_FILMS_COLUMNS}
     
-    def find_favorite_genres_user(self, User_id):
-        new_df = self.df_films_reviews[self.df_films_reviews['userId'] == User_id]
-        avg_ratings = new_df.groupby('genres')['rating'].mean().reset_index().rename(columns={'rating': 'avg_rating'})
-        avg = pd.DataFrame(avg_ratings).sort_values('avg_rating',ascending=False)
-        cnt_ratings = new_df.groupby('genres')['rating'].count().reset_index().rename(columns={'rating': 'count_rating'})
-        cnt=pd.DataFrame(cnt_ratings).sort_values('count_rating',ascending=False)
-        popularite=avg.merge(cnt,on='genres')
-        v=popularite["count_rating"]
-        R=popularite["avg_rating"]
-        m=v.quantile(0.90)
-        c=R.mean()
-        popularite['w_score']=((v*R) + (m*c)) / (v+m)
-        return popularite.sort_values('w_score',ascending=False).head(10).reset_index()[['genres', 'w_score']]
+    def find_favorite_genres_user(self, User_id) -> dict:
+        return self.favorite_genres.top(User_id)
+
+    def user_profile(self, User_id, engine: str = 'knn') -> dict:
+        return {
+            'rating_films' : self.find_rating_films_user(User_id),
+            'favorite_genres' : self.find_favorite_genres_user(User_id),
+            'favorite_films' : self.find_favorite_films_batch([User_id], engine=engine).get(User_id)
+        }
     
     def genre_films(self):
         return self.df_films_reviews['genres'].unique().tolist()
@@ -95,45 +329,88 @@ class RecomendationSystem:
         return self.df_films_reviews['title'].unique().tolist()
 
     def users_id(self):
-        new_df = self.df_films_reviews[(self.df_films_reviews['userId'].map(self.df_films_reviews['userId'].value_counts()) > 1000) | (self.df_films_reviews['userId'] == 222333) | (self.df_films_reviews['userId'] == 333222)]
-        return new_df.userId.unique().tolist()
+        return self.pivot_users.tolist()
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+instrument(app)
 recomendation_system = RecomendationSystem()
 
-@app.get('/get_popularite_films')
+@app.on_event("startup")
+def startup_event():
+    recomendation_system.start_compaction()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    recomendation_system.flush()
+
+@app.post('/add_ratings', response_model=AddedRatings)
+def add_ratings(ratings: list[NewRating]):
+    try:
+        return recomendation_system.add_ratings(pd.DataFrame([rating.model_dump() for rating in ratings], columns=list(NewRating.model_fields)))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+@app.get('/get_popularite_films', response_model=PopularFilms)
 def get_popularite_films():
     return recomendation_system.popularite_films()
 
-@app.get('/get_popularite_films_by_genre/{genre}')
+@app.get('/get_popularite_films_by_genre/{genre}', response_model=PopularFilms)
 def get_popularite_films_by_genre(genre: str):
     return recomendation_system.popularite_films_by_genre(genre)
 
-@app.get('/get_same_films_by_name/{name_film}')
-def get_same_films_by_name(name_film: str):
-    return recomendation_system.same_films(name_film)
+@app.get('/get_same_films_by_name/{name_film}', response_model=SameFilms, response_model_exclude_none=True)
+def get_same_films_by_name(name_film: str, engine: Literal['correlation', 'svd'] = 'correlation'):
+    with stage_timer(engine, 'forward'):
+        try:
+            same_films = recomendation_system.same_films(name_film, engine)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return serialize(SameFilms, same_films, engine)
+
+@app.post('/get_same_films_by_name/batch', response_model=dict[str, SameFilms], response_model_exclude_none=True)
+def get_same_films_by_name_batch(names_film: list[str] = Body(...), engine: Literal['correlation', 'svd'] = 'correlation'):
+    with stage_timer(engine, 'forward'):
+        same_films = recomendation_system.same_films_batch(names_film, engine)
+    return serialize(dict[str, SameFilms], same_films, engine)
+
+@app.get('/get_favorite_films/{user_id}', response_model=FavoriteFilms, response_model_exclude_none=True)
+def get_favorite_films(user_id: int, engine: Literal['knn', 'svd'] = 'knn'):
+    with stage_timer(engine, 'forward'):
+        try:
+            favorite_films = recomendation_system.find_favorite_films(user_id, engine=engine)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f'Неизвестный пользователь: {user_id}')
+    return serialize(FavoriteFilms, favorite_films, engine)
+
+@app.post('/get_favorite_films/batch', response_model=dict[int, FavoriteFilms], response_model_exclude_none=True)
+def get_favorite_films_batch(users_id: list[int] = Body(...), engine: Literal['knn', 'svd'] = 'knn'):
+    with stage_timer(engine, 'forward'):
+        favorite_films = recomendation_system.find_favorite_films_batch(users_id, engine=engine)
+    return serialize(dict[int, FavoriteFilms], favorite_films, engine)
 
-@app.get('/get_favorite_films/{user_id}')
-def get_favorite_films(user_id: int):
-    return recomendation_system.find_favorite_films(user_id)
+@app.get('/get_user_profile/{user_id}', response_model=UserProfile, response_model_exclude_none=True)
+def get_user_profile(user_id: int, engine: Literal['knn', 'svd'] = 'knn'):
+    with stage_timer(engine, 'forward'):
+        user_profile = recomendation_system.user_profile(user_id, engine)
+    return serialize(UserProfile, user_profile, engine)
 
-@app.get('/get_find_rating_films_user/{user_id}')
+@app.get('/get_find_rating_films_user/{user_id}', response_model=RatingFilms)
 def get_find_rating_films_user(user_id: int):
     return recomendation_system.find_rating_films_user(user_id)
 
-@app.get('/get_find_favorite_genres_user/{user_id}')
+@app.get('/get_find_favorite_genres_user/{user_id}', response_model=FavoriteGenres)
 def get_find_favorite_genres_user(user_id: int):
     return recomendation_system.find_favorite_genres_user(user_id)
 
-@app.get('/get_genre_films/')
+@app.get('/get_genre_films/', response_model=list[str])
 def get_genre_films():
     return recomendation_system.genre_films()
 
-@app.get('/get_name_films/')
+@app.get('/get_name_films/', response_model=list[str])
 def get_name_films():
     return recomendation_system.name_films()
 
-@app.get('/get_users_id/')
+@app.get('/get_users_id/', response_model=list[int])
 def get_users_id():
     return recomendation_system.users_id()
 
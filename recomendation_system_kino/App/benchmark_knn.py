@@ -0,0 +1,59 @@
+import argparse, time, numpy as np
+from sklearn.neighbors import NearestNeighbors
+from api import RecomendationSystem, recomendation_system
+
+
+def per_request_fit(recomendation_system: RecomendationSystem, user_id, num_books: int):
+    # Старый вариант: модель создаётся и обучается заново на каждый запрос
+    model_knn = NearestNeighbors(metric='cosine', algorithm='brute')
+    model_knn.fit(recomendation_system.film_df_matrix)
+    user_index = recomendation_system.pivot_user_index[user_id]
+    return model_knn.kneighbors(recomendation_system.film_df_matrix[user_index], n_neighbors=num_books+1)
+
+
+def timeit(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение обучения NearestNeighbors на каждый запрос и закешированного индекса')
+    parser.add_argument('--users', type=int, default=100, help='количество случайных пользователей')
+    parser.add_argument('--num-books', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    users_id = rng.choice(recomendation_system.pivot_users, size=min(args.users, len(recomendation_system.pivot_users)), replace=False).tolist()
+
+    start = time.perf_counter()
+    for user_id in users_id:
+        per_request_fit(recomendation_system, user_id, args.num_books)
+    old_time = (time.perf_counter() - start) / len(users_id)
+
+    start = time.perf_counter()
+    for user_id in users_id:
+        recomendation_system.find_favorite_films(user_id, args.num_books)
+    cached_time = (time.perf_counter() - start) / len(users_id)
+
+    batch_time = timeit(lambda: recomendation_system.find_favorite_films_batch(users_id, args.num_books), 1) / len(users_id)
+
+    mismatches = 0
+    for user_id in users_id:
+        _, old_indices = per_request_fit(recomendation_system, user_id, args.num_books)
+        user_index = recomendation_system.pivot_user_index[user_id]
+        _, new_indices = recomendation_system.model_knn.kneighbors([user_index], args.num_books+1)
+        mismatches += set(old_indices[0][1:]) != set(new_indices[0][1:])
+
+    print(f'Пользователей: {len(users_id)}, матрица: {recomendation_system.film_df_matrix.shape}')
+    print(f'Обучение на каждый запрос: {old_time * 1000:.2f} мс/пользователь')
+    print(f'Закешированный индекс:     {cached_time * 1000:.2f} мс/пользователь')
+    print(f'Пакетный kneighbors:       {batch_time * 1000:.2f} мс/пользователь')
+    print(f'Ускорение: x{old_time / cached_time:.1f} (пакетно x{old_time / batch_time:.1f})')
+    print(f'Расхождений в соседях: {mismatches}')
+
+
+if __name__ == '__main__':
+    main()
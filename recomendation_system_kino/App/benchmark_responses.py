@@ -0,0 +1,57 @@
+import argparse, time, numpy as np, pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from api import recomendation_system
+from responses import PopularFilms, SameFilms, FavoriteFilms, UserProfile
+
+
+def dataframe_response(content) -> bytes:
+    # Прежний путь: каждая таблица ответа - DataFrame, сериализация через jsonable_encoder + JSONResponse
+    if isinstance(content, dict) and all(isinstance(value, dict) or value is None for value in content.values()):
+        content = {key: value if value is None else pd.DataFrame(value) for key, value in content.items()}
+    else:
+        content = pd.DataFrame(content)
+    return JSONResponse(jsonable_encoder(content, custom_encoder={np.generic: lambda value: value.item()})).body
+
+
+def typed_response(model, content) -> bytes:
+    return ORJSONResponse(model.model_validate(content).model_dump(mode='json', by_alias=True, exclude_none=True)).body
+
+
+def measure(function, queries) -> tuple[float, float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Накладные расходы на ответ эндпоинтов: DataFrame + JSONResponse против списков NumPy + ORJSONResponse')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    users_id = rng.choice(recomendation_system.pivot_users, size=args.queries).tolist()
+    titles = rng.choice(recomendation_system.pivot_titles, size=args.queries).tolist()
+
+    # Сами ответы считаются один раз - сравнивается только упаковка в HTTP-ответ
+    endpoints = {
+        'popularite_films': (PopularFilms, [recomendation_system.popularite_films()] * args.queries),
+        'same_films': (SameFilms, [recomendation_system.same_films(title) for title in titles]),
+        'favorite_films': (FavoriteFilms, [recomendation_system.find_favorite_films(user_id) for user_id in users_id]),
+        'user_profile': (UserProfile, [recomendation_system.user_profile(user_id) for user_id in users_id])
+    }
+
+    print(f'{"эндпоинт":<20}{"путь":<12}{"p50, мс":>10}{"p99, мс":>10}')
+    for name, (model, contents) in endpoints.items():
+        for path, function in (('dataframe', dataframe_response), ('numpy', lambda content: typed_response(model, content))):
+            p50, p99 = measure(function, contents)
+            print(f'{name:<20}{path:<12}{p50:>10.3f}{p99:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
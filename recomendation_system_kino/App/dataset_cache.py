@@ -0,0 +1,117 @@
+import os, json, shutil, hashlib, numpy as np, pandas as pd
+from scipy.sparse import csr_matrix
+
+URL_DATASET_CACHE = 'datasets/cache/df_films_reviews'
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path: str, size: int) -> str:
+    # Хешируются ровно size байт: дописанные после os.stat строки не смешиваются с прочитанным состоянием файла
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        while size > 0 and (chunk := file.read(min(HASH_CHUNK_SIZE, size))):
+            digest.update(chunk)
+            size -= len(chunk)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Бинарный колоночный кеш CSV с оценками: столбцы в .npy (строки - коды + категории, загружаются как pd.Categorical), матрица пользователи x фильмы - тоже в .npy, чтобы их можно было отображать в память (mmap).
+
+    Кеш привязан к mtime, размеру и хешу CSV; хеш пересчитывается только если изменились mtime или размер.
+    """
+
+    def __init__(self, path_csv: str, cache_dir: str = URL_DATASET_CACHE, stat: os.stat_result | None = None):
+        # stat - состояние CSV, которому соответствуют кешируемые данные (по умолчанию - текущее)
+        self.path_csv = path_csv
+        self.cache_dir = cache_dir
+        self.path_meta = os.path.join(cache_dir, 'meta.json')
+        self.meta = self.read_meta()
+        self.stat = stat or os.stat(path_csv)
+        self.hash = self.compute_hash(self.stat)
+        self.valid = self.meta.get('hash') == self.hash
+
+    @property
+    def signature(self) -> np.ndarray:
+        return np.frombuffer(bytes.fromhex(self.hash), dtype=np.uint8)
+
+    def read_meta(self) -> dict:
+        try:
+            with open(self.path_meta, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def write_meta(self, **meta):
+        # mtime и размер берутся из того же os.stat, по которому считался хеш, а не с текущего файла
+        self.meta = {**self.meta, **meta, 'hash': self.hash, 'mtime_ns': self.stat.st_mtime_ns, 'size': self.stat.st_size}
+        path_tmp = f'{self.path_meta}.tmp'
+        with open(path_tmp, 'w') as file:
+            json.dump(self.meta, file)
+        os.replace(path_tmp, self.path_meta)
+
+    def compute_hash(self, stat: os.stat_result) -> str:
+        if self.meta.get('mtime_ns') == stat.st_mtime_ns and self.meta.get('size') == stat.st_size:
+            return self.meta['hash']
+        return file_hash(self.path_csv, stat.st_size)
+
+    def load_dataset(self) -> pd.DataFrame | None:
+        if not self.valid or 'columns' not in self.meta:
+            return None
+        if self.stat.st_mtime_ns != self.meta['mtime_ns']:
+            # Файл переписан с тем же содержимым - кеш подходит, запоминаем новый mtime
+            self.write_meta()
+
+        columns = {}
+        for column in self.meta['columns']:
+            path_column = os.path.join(self.cache_dir, column['file'])
+            if column['kind'] == 'codes':
+                # Коды остаются отображёнными в память, пропуски (-1) Categorical сам считает NaN
+                codes = np.load(f'{path_column}.codes.npy', mmap_mode='r')
+                categories = np.load(f'{path_column}.categories.npy')
+                columns[column['name']] = pd.Categorical.from_codes(codes, categories)
+            else:
+                columns[column['name']] = np.load(f'{path_column}.npy', mmap_mode='r')
+        return pd.DataFrame(columns, copy=False)
+
+    def save_dataset(self, df_films_reviews: pd.DataFrame):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.meta = {}
+
+        columns = []
+        for number, name in enumerate(df_films_reviews.columns):
+            series = df_films_reviews[name]
+            path_column = os.path.join(self.cache_dir, f'column_{number}')
+            if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+                # Коды сохраняются в том же целом типе, что выбирает Categorical, чтобы from_codes не копировал их при загрузке
+                categorical = pd.Categorical(series)
+                np.save(f'{path_column}.codes.npy', categorical.codes)
+                np.save(f'{path_column}.categories.npy', np.asarray(categorical.categories, dtype=str))
+                kind = 'codes'
+            else:
+                np.save(f'{path_column}.npy', series.to_numpy())
+                kind = 'values'
+            columns.append({'name': name, 'file': f'column_{number}', 'kind': kind})
+
+        self.write_meta(columns=columns)
+        self.valid = True
+
+    def load_matrix(self, params: dict):
+        # params - параметры построения матрицы (фильтр пользователей), при их изменении кеш матрицы не используется
+        if not self.valid or self.meta.get('matrix') != params:
+            return None
+        arrays = {name: np.load(os.path.join(self.cache_dir, f'pivot_{name}.npy'), mmap_mode='r') for name in ('users', 'titles', 'data', 'indices', 'indptr')}
+        film_df_matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=(len(arrays['users']), len(arrays['titles'])))
+        return np.asarray(arrays['users']), arrays['titles'].astype(object), film_df_matrix
+
+    def save_matrix(self, params: dict, pivot_users: np.ndarray, pivot_titles: np.ndarray, film_df_matrix: csr_matrix):
+        if not self.valid:
+            return
+        arrays = {
+            'users': pivot_users, 'titles': np.asarray(pivot_titles, dtype=str),
+            'data': film_df_matrix.data, 'indices': film_df_matrix.indices, 'indptr': film_df_matrix.indptr
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(self.cache_dir, f'pivot_{name}.npy'), array)
+        self.write_meta(matrix=params)
@@ -0,0 +1,114 @@
+import argparse, time, numpy as np
+from scipy.sparse import csr_matrix
+from api import recomendation_system
+from factorization import FactorizationEngine, N_COMPONENTS
+from similarity_index import SimilarityIndex
+from user_neighbors import UserNeighbors
+
+
+def split_holdout(film_df_matrix: csr_matrix, rows: np.ndarray, fraction: float, min_rating: float, rng) -> tuple[csr_matrix, dict]:
+    # Часть хорошо оценённых фильмов выбранных пользователей скрывается из обучающей матрицы
+    train = film_df_matrix.copy().tocsr()
+    heldout = {}
+    for row in rows:
+        start, stop = train.indptr[row], train.indptr[row + 1]
+        liked = np.flatnonzero(train.data[start:stop] >= min_rating) + start
+        count = int(len(liked) * fraction)
+        if count == 0:
+            continue
+        chosen = rng.choice(liked, size=count, replace=False)
+        heldout[row] = set(train.indices[chosen].tolist())
+        train.data[chosen] = 0
+    train.eliminate_zeros()
+    return train, heldout
+
+
+def recommend_by_items(similar, train: csr_matrix, row: int, n: int, seeds: int) -> list:
+    # Рекомендации пользователю по похожим фильмам для его самых высоко оценённых фильмов
+    start, stop = train.indptr[row], train.indptr[row + 1]
+    rated = set(train.indices[start:stop].tolist())
+    seed_columns = train.indices[start:stop][np.argsort(-train.data[start:stop], kind='stable')[:seeds]]
+
+    scores = {}
+    for column in seed_columns:
+        for neighbor, score in zip(*similar(column)):
+            if neighbor >= 0 and neighbor not in rated and np.isfinite(score):
+                scores[neighbor] = max(scores.get(neighbor, -np.inf), score)
+    return sorted(scores, key=scores.get, reverse=True)[:n]
+
+
+def recall(recommendations: dict, heldout: dict, n: int) -> float:
+    return float(np.mean([len(set(recommendations[row]) & titles) / min(n, len(titles)) for row, titles in heldout.items()]))
+
+
+def latency(function, queries) -> tuple[float, float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        timings.append(time.perf_counter() - start)
+    return np.mean(timings) * 1000, np.percentile(timings, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение качества (recall@N) и задержки KNN, корреляции и SVD')
+    parser.add_argument('--users', type=int, default=200, help='количество пользователей для проверки')
+    parser.add_argument('--n', type=int, default=10, help='длина списка рекомендаций')
+    parser.add_argument('--fraction', type=float, default=0.2, help='доля скрываемых оценок пользователя')
+    parser.add_argument('--min-rating', type=float, default=4.0, help='оценка, с которой фильм считается понравившимся')
+    parser.add_argument('--components', type=int, default=N_COMPONENTS)
+    parser.add_argument('--seeds', type=int, default=5, help='количество любимых фильмов для рекомендаций по похожим фильмам')
+    parser.add_argument('--skip-correlation', action='store_true', help='не строить индекс корреляций (самая долгая часть)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    film_df_matrix, titles = recomendation_system.film_df_matrix, recomendation_system.pivot_titles
+    rows = rng.choice(film_df_matrix.shape[0], size=min(args.users, film_df_matrix.shape[0]), replace=False)
+    train, heldout = split_holdout(film_df_matrix, rows, args.fraction, args.min_rating, rng)
+    rows = np.array(sorted(heldout))
+    print(f'Матрица: {film_df_matrix.shape}, пользователей в проверке: {len(rows)}')
+
+    start = time.perf_counter()
+    model_knn = UserNeighbors.fit(train)
+    print(f'Обучение knn: {time.perf_counter() - start:.1f} с')
+    start = time.perf_counter()
+    factorization = FactorizationEngine.fit(train, args.components)
+    print(f'Обучение svd ({factorization.item_factors.shape[1]} компонент): {time.perf_counter() - start:.1f} с')
+
+    results = {}
+    # Текущий путь /get_favorite_films: индексы соседей-пользователей используются как индексы фильмов
+    _, indices = model_knn.kneighbors(rows, args.n + 1)
+    results['knn (пользователи)'] = (
+        recall({row: indices[i][1:].tolist() for i, row in enumerate(rows)}, heldout, args.n),
+        latency(lambda row: model_knn.kneighbors([row], args.n + 1), rows)
+    )
+    indices, _ = factorization.recommend(rows, args.n, train)
+    results['svd (пользователи)'] = (
+        recall({row: indices[i].tolist() for i, row in enumerate(rows)}, heldout, args.n),
+        latency(lambda row: factorization.recommend([row], args.n, train), rows)
+    )
+
+    similar_svd = lambda column: tuple(array[0] for array in factorization.similar_titles([column], args.n))
+    results['svd (фильмы)'] = (
+        recall({row: recommend_by_items(similar_svd, train, row, args.n, args.seeds) for row in rows}, heldout, args.n),
+        latency(similar_svd, rng.choice(len(titles), size=len(rows)))
+    )
+
+    if not args.skip_correlation:
+        start = time.perf_counter()
+        similarity_index = SimilarityIndex.build(train, titles)
+        print(f'Построение индекса корреляций: {time.perf_counter() - start:.1f} с')
+        similar_correlation = lambda column: (similarity_index.neighbors[column, :args.n], similarity_index.scores[column, :args.n])
+        results['корреляция (фильмы)'] = (
+            recall({row: recommend_by_items(similar_correlation, train, row, args.n, args.seeds) for row in rows}, heldout, args.n),
+            latency(lambda title: similarity_index.most_similar(title, args.n), titles[rng.choice(len(titles), size=len(rows))])
+        )
+
+    print(f'{"движок":<22}{f"recall@{args.n}":>12}{"среднее, мс":>14}{"p95, мс":>10}')
+    for name, (engine_recall, (mean_latency, p95_latency)) in results.items():
+        print(f'{name:<22}{engine_recall:>12.4f}{mean_latency:>14.3f}{p95_latency:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import os, numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.decomposition import TruncatedSVD
+
+URL_FACTORIZATION = 'datasets/cache/factorization.npz'
+N_COMPONENTS = 64
+
+
+def top_n(scores: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    n = min(n, scores.shape[1])
+    indices = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    top_scores = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class FactorizationEngine:
+    """Рекомендации через усечённое SVD матрицы пользователи x фильмы: плотные факторы пользователей и фильмов."""
+
+    def __init__(self, user_factors: np.ndarray, item_factors: np.ndarray):
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        norms = np.linalg.norm(item_factors, axis=1, keepdims=True)
+        self.item_factors_normalized = np.divide(item_factors, norms, out=np.zeros_like(item_factors), where=norms > 0)
+
+    @classmethod
+    def fit(cls, film_df_matrix: csr_matrix, n_components: int = N_COMPONENTS, random_state: int = 0):
+        n_components = min(n_components, min(film_df_matrix.shape) - 1)
+        svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+        user_factors = svd.fit_transform(film_df_matrix).astype(np.float32)
+        return cls(user_factors, svd.components_.T.astype(np.float32))
+
+    def save(self, path: str, signature: np.ndarray):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, user_factors=self.user_factors, item_factors=self.item_factors, signature=signature)
+
+    @classmethod
+    def load(cls, path: str, signature: np.ndarray):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if not np.array_equal(data['signature'], signature):
+                return None
+            return cls(data['user_factors'], data['item_factors'])
+
+    @classmethod
+    def load_or_fit(cls, path: str, signature: np.ndarray, film_df_matrix: csr_matrix):
+        engine = cls.load(path, signature)
+        if engine is None or (engine.user_factors.shape[0], engine.item_factors.shape[0]) != film_df_matrix.shape:
+            engine = cls.fit(film_df_matrix)
+            engine.save(path, signature)
+        return engine
+
+    def replace_rows(self, positions, rows: csr_matrix, n_rows: int):
+        # Новые и изменившиеся пользователи проецируются на уже обученные факторы фильмов (fold-in), без переобучения
+        user_factors = np.zeros((n_rows, self.user_factors.shape[1]), dtype=self.user_factors.dtype)
+        user_factors[:len(self.user_factors)] = self.user_factors[:n_rows]
+        user_factors[np.asarray(positions)] = rows @ self.item_factors
+        self.user_factors = user_factors
+
+    def recommend(self, rows, n: int, film_df_matrix: csr_matrix) -> tuple[np.ndarray, np.ndarray]:
+        # Одно произведение матрицы на вектор на пользователя, уже оценённые фильмы исключаются
+        rows = np.atleast_1d(np.asarray(rows))
+        scores = self.user_factors[rows] @ self.item_factors.T
+        rated = film_df_matrix[rows].tocoo()
+        scores[rated.row, rated.col] = -np.inf
+        return top_n(scores, n)
+
+    def similar_titles(self, columns, n: int) -> tuple[np.ndarray, np.ndarray]:
+        columns = np.atleast_1d(np.asarray(columns))
+        scores = self.item_factors_normalized[columns] @ self.item_factors_normalized.T
+        scores[np.arange(len(columns)), columns] = -np.inf
+        return top_n(scores, n)
@@ -1,43 +1,88 @@
-import requests, streamlit as st, pandas as pd, logging, time
+import requests, streamlit as st, pandas as pd, logging, sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from api_client import get_client
 
 API_BASE_URL = "http://127.0.0.1:8000/"
+# Время жизни кеша в секундах: списки для выпадающих меню меняются редко, рекомендации - после уплотнения новых оценок
+DROPDOWN_TTL = 3600
+RESULTS_TTL = 300
 
-def request_api(path_to_api: str, data: str = None):
-    trying = 5
-    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-
-    logger = logging.getLogger(__name__)
-
-    while trying > 0:
-        try:
-            url = f"{API_BASE_URL}{path_to_api}"
+class ApiUnavailableError(Exception):
+    pass
 
-            if data:
-                response = requests.get(f'{url}{data}')
-            else:
-                response = requests.get(url)
+class ApiResponseError(Exception):
+    pass
 
-            return response.json()
+def response_detail(response: requests.Response) -> str:
+    try:
+        return str(response.json().get('detail', response.text))
+    except (ValueError, AttributeError):
+        return response.text
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка при обращении к API\n{str(e)}")
+def request_api(path_to_api: str, data: str = None):
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Ошибка подключения к API\n{str(e)}")
-        
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка\n{str(e)}")
+    logger = logging.getLogger(__name__)
 
-        time.sleep(5)
-        trying -= 1
+    # Повторы с экспоненциальной задержкой и таймауты - в общем клиенте
+    try:
+        if data:
+            response = get_client(API_BASE_URL).get(f'{path_to_api}{data}')
+        else:
+            response = get_client(API_BASE_URL).get(path_to_api)
+
+        # Ответ с ошибкой (например, 404 для ещё не добавленного пользователя) поднимается исключением, чтобы st.cache_data его не запомнил
+        if not response.ok:
+            raise ApiResponseError(f"{response.status_code}: {response_detail(response)}")
+        return response.json()
+
+    except ApiResponseError as e:
+        logger.error(f"API вернул ошибку\n{str(e)}")
+        raise
+
+    except requests.exceptions.ConnectionError as e:
+        logger.error(f"Ошибка подключения к API\n{str(e)}")
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Ошибка при обращении к API\n{str(e)}")
+
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка\n{str(e)}")
+
+def request_api_or_raise(path_to_api: str, data: str = None):
+    # st.cache_data не кеширует исключения: при недоступном API следующий перезапуск страницы повторит запрос
+    response = request_api(path_to_api, data)
+    if response is None:
+        raise ApiUnavailableError(path_to_api)
+    return response
+
+@st.cache_data(ttl=DROPDOWN_TTL, show_spinner=False)
+def request_dropdown(path_to_api: str):
+    return request_api_or_raise(path_to_api)
+
+@st.cache_data(ttl=RESULTS_TTL, show_spinner=False)
+def request_result(path_to_api: str, data: str = None):
+    return request_api_or_raise(path_to_api, data)
+
+def cached_request(function, *args):
+    try:
+        return function(*args)
+    except ApiUnavailableError:
+        return None
+    except ApiResponseError as e:
+        st.error(f"Ошибка API: {str(e)}")
+        return None
 
 def site():
     def click_btn(path_to_api: str, data_api: str, collabarativ: bool = False):
         with st.spinner("Ожидайте ответ от API"):
-            df_response = request_api(path_to_api, data_api)
             if collabarativ:
-                df_user_rating_films = request_api('get_find_rating_films_user/', data_api)
-                df_user_rating_genres = request_api('get_find_favorite_genres_user/', data_api)
+                user_profile = cached_request(request_result, 'get_user_profile/', data_api) or {}
+                df_user_rating_films = user_profile.get('rating_films')
+                df_user_rating_genres = user_profile.get('favorite_genres')
+                df_response = user_profile.get('favorite_films')
+            else:
+                df_response = cached_request(request_result, path_to_api, data_api)
 
         if collabarativ:
             st.write(pd.DataFrame(df_user_rating_films))
@@ -50,15 +95,17 @@ def site():
         st.header(title_text)
         if title_text == "Топ 10 фильмов":
             with st.spinner("Ожидайте ответ от API"):
-                df_popularite_films = request_api(path_to_api)
+                df_popularite_films = cached_request(request_result, path_to_api)
                 st.dataframe(df_popularite_films)
             return
         
         with st.spinner("Ожидайте ответ от API"):
-            data_for_dropdown_list = request_api(api_for_dropdown_list)
+            data_for_dropdown_list = cached_request(request_dropdown, api_for_dropdown_list)
 
         option =  st.selectbox("Выберете значение:", data_for_dropdown_list)
-        st.button('Нажмите для получения списка фильмов', on_click=click_btn(path_to_api, option, collabarativ=True if title_text == 'Топ 10 фильмов по схожести интересов' else False))
+        # Запрос выполняется только по нажатию кнопки, а не при каждом перезапуске страницы
+        if st.button('Нажмите для получения списка фильмов'):
+            click_btn(path_to_api, option, collabarativ=True if title_text == 'Топ 10 фильмов по схожести интересов' else False)
 
     def information_page():
         st.header("Проект для рекомендации фильмов")
@@ -0,0 +1,73 @@
+import threading, numpy as np, pandas as pd
+
+
+def weighted_score(count_rating: np.ndarray, avg_rating: np.ndarray) -> np.ndarray:
+    # w_score = (v * R + m * c) / (v + m), m - 90-й перцентиль количества оценок, c - средняя оценка
+    m = np.quantile(count_rating, 0.90)
+    c = np.mean(avg_rating)
+    return ((count_rating * avg_rating) + (m * c)) / (count_rating + m)
+
+
+class WeightedRating:
+    """Взвешенный рейтинг по столбцу `by` (отдельно внутри каждого значения `group_by`) с кешем топ-N.
+
+    Хранятся только суммы и количества оценок, поэтому новые оценки добавляются без пересчёта по всему датасету.
+    Топ-N хранится готовыми списками столбцов {by: [...], 'w_score': [...]}, которые сразу отдаются в ответ API.
+    """
+
+    def __init__(self, df_films_reviews: pd.DataFrame, by: str, group_by: str | None = None, top_n: int = 10, max_cached_groups: int | None = None):
+        self.by = by
+        self.group_by = group_by
+        self.top_n = top_n
+        self.max_cached_groups = max_cached_groups
+        self.keys = [by] if group_by is None else [group_by, by]
+        self.aggregates = self.aggregate(df_films_reviews)
+        self.cache = {}
+        # Эндпоинты FastAPI выполняются в пуле потоков, поэтому агрегаты и кеш меняются только под блокировкой
+        self.lock = threading.Lock()
+
+    def aggregate(self, df_films_reviews: pd.DataFrame) -> pd.DataFrame:
+        # observed=True: для категориальных столбцов из кеша не строится декартово произведение всех категорий
+        return df_films_reviews.groupby(self.keys, observed=True)['rating'].agg(['sum', 'count']).sort_index()
+
+    def append(self, new_reviews: pd.DataFrame):
+        new_aggregates = self.aggregate(new_reviews)
+        with self.lock:
+            self.aggregates = self.aggregates.add(new_aggregates, fill_value=0)
+            if not self.aggregates.index.is_monotonic_increasing:
+                self.aggregates = self.aggregates.sort_index()
+
+            if self.group_by is None:
+                self.cache.clear()
+            else:
+                for group in new_reviews[self.group_by].unique():
+                    self.cache.pop(group, None)
+
+    def groups(self) -> list:
+        if self.group_by is None:
+            return [None]
+        return self.aggregates.index.get_level_values(0).unique().tolist()
+
+    def precompute(self):
+        for group in self.groups():
+            self.top(group)
+
+    def top(self, group=None) -> dict:
+        with self.lock:
+            if group not in self.cache:
+                if self.max_cached_groups is not None and len(self.cache) >= self.max_cached_groups:
+                    self.cache.pop(next(iter(self.cache)))
+                self.cache[group] = self.compute_top(group)
+            return self.cache[group]
+
+    def compute_top(self, group=None) -> dict:
+        try:
+            aggregates = self.aggregates if self.group_by is None else self.aggregates.loc[group]
+        except KeyError:
+            return {self.by : [], 'w_score' : []}
+
+        count_rating = aggregates['count'].to_numpy()
+        avg_rating = aggregates['sum'].to_numpy() / count_rating
+        w_score = weighted_score(count_rating, avg_rating)
+        order = np.argsort(-w_score, kind='stable')[:self.top_n]
+        return {self.by : aggregates.index.to_numpy()[order].tolist(), 'w_score' : w_score[order].tolist()}
@@ -0,0 +1,56 @@
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, TypeAdapter
+from service_metrics import stage_timer
+
+# Ответы API - столбцы таблицы списками (как раньше у DataFrame), собираются сразу из массивов NumPy
+
+
+class PopularFilms(BaseModel):
+    title: list[str]
+    w_score: list[float]
+
+
+class FavoriteGenres(BaseModel):
+    genres: list[str]
+    w_score: list[float]
+
+
+class SameFilms(BaseModel):
+    title: list[str]
+    correlation: list[float] | None = None
+    similarity: list[float] | None = None
+
+
+class FavoriteFilms(BaseModel):
+    favorite_films: list[str] = Field(alias='favorite films ')
+    distances: list[float] | None = None
+    score: list[float] | None = None
+
+
+class RatingFilms(BaseModel):
+    title: list[str]
+    year_production: list[int | float | str] = Field(alias='year-production')
+    genres: list[str]
+    rating: list[float]
+
+
+class UserProfile(BaseModel):
+    rating_films: RatingFilms
+    favorite_genres: FavoriteGenres
+    favorite_films: FavoriteFilms | None = None
+
+
+class AddedRatings(BaseModel):
+    added: int
+
+
+RESPONSE_ADAPTERS = {}
+
+
+def serialize(response_type, content, model: str) -> ORJSONResponse:
+    # Проверка и сериализация в обработчике, а не в FastAPI, чтобы время попало в метрику этапа serialize
+    if response_type not in RESPONSE_ADAPTERS:
+        RESPONSE_ADAPTERS[response_type] = TypeAdapter(response_type)
+    adapter = RESPONSE_ADAPTERS[response_type]
+    with stage_timer(model, 'serialize'):
+        return ORJSONResponse(adapter.dump_python(adapter.validate_python(content), mode='json', by_alias=True, exclude_none=True))
@@ -0,0 +1,79 @@
+import os, numpy as np
+from scipy.sparse import csr_matrix
+
+URL_SIMILARITY_INDEX = 'datasets/cache/similarity_index.npz'
+TOP_K = 50
+BLOCK_SIZE = 256
+
+
+class SimilarityIndex:
+    """Топ-K похожих фильмов (корреляция Пирсона по оценкам пользователей) для каждого фильма."""
+
+    def __init__(self, titles: np.ndarray, neighbors: np.ndarray, scores: np.ndarray):
+        self.titles = titles
+        self.neighbors = neighbors
+        self.scores = scores
+        self.title_index = {title: idx for idx, title in enumerate(titles)}
+
+    @classmethod
+    def build(cls, film_df_matrix: csr_matrix, titles, top_k: int = TOP_K, block_size: int = BLOCK_SIZE):
+        # Та же корреляция, что и users_pivot.corrwith(...), но без плотной матрицы:
+        # cov(i, j) = E[x_i * x_j] - E[x_i] * E[x_j], где E[x_i * x_j] берётся из X.T @ X блоками столбцов
+        matrix = film_df_matrix.tocsc().astype(np.float64)
+        n_users, n_titles = matrix.shape
+        top_k = min(top_k, n_titles - 1)
+
+        mean = np.asarray(matrix.sum(axis=0)).ravel() / n_users
+        mean_sq = np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel() / n_users
+        std = np.sqrt(np.maximum(mean_sq - mean ** 2, 0))
+        matrix_t = matrix.T.tocsr()
+
+        neighbors = np.full((n_titles, top_k), -1, dtype=np.int32)
+        scores = np.full((n_titles, top_k), np.nan, dtype=np.float32)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for start in range(0, n_titles, block_size):
+                stop = min(start + block_size, n_titles)
+                cross = (matrix_t @ matrix[:, start:stop]).toarray() / n_users
+                corr = (cross - np.outer(mean, mean[start:stop])) / np.outer(std, std[start:stop])
+                corr[~np.isfinite(corr)] = -np.inf
+                corr[np.arange(start, stop), np.arange(stop - start)] = -np.inf
+
+                top = np.argpartition(-corr, top_k - 1, axis=0)[:top_k]
+                top_scores = np.take_along_axis(corr, top, axis=0)
+                order = np.argsort(-top_scores, axis=0, kind='stable')
+                top = np.take_along_axis(top, order, axis=0).T
+                top_scores = np.take_along_axis(top_scores, order, axis=0).T
+
+                valid = np.isfinite(top_scores)
+                neighbors[start:stop] = np.where(valid, top, -1)
+                scores[start:stop] = np.where(valid, top_scores, np.nan)
+
+        return cls(np.asarray(titles, dtype=str), neighbors, scores)
+
+    def save(self, path: str, signature: np.ndarray):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, titles=self.titles, neighbors=self.neighbors, scores=self.scores, signature=signature)
+
+    @classmethod
+    def load(cls, path: str, signature: np.ndarray):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if not np.array_equal(data['signature'], signature):
+                return None
+            return cls(data['titles'], data['neighbors'], data['scores'])
+
+    @classmethod
+    def load_or_build(cls, path: str, signature: np.ndarray, film_df_matrix: csr_matrix, titles, top_k: int = TOP_K):
+        index = cls.load(path, signature)
+        if index is None or index.neighbors.shape[1] < min(top_k, len(titles) - 1) or not np.array_equal(index.titles, np.asarray(titles, dtype=str)):
+            index = cls.build(film_df_matrix, titles, top_k)
+            index.save(path, signature)
+        return index
+
+    def most_similar(self, name_film: str, count: int = 10):
+        row = self.title_index[name_film]
+        neighbors = self.neighbors[row, :count]
+        valid = neighbors >= 0
+        return self.titles[neighbors[valid]], self.scores[row, :count][valid]
@@ -0,0 +1,70 @@
+import os, numpy as np
+from scipy.sparse import csr_matrix, diags
+from sklearn.preprocessing import normalize
+
+URL_USER_NEIGHBORS = 'datasets/cache/user_neighbors.npz'
+
+
+def replace_rows(matrix: csr_matrix, positions, rows: csr_matrix, n_rows: int) -> csr_matrix:
+    # Заменяет строки positions матрицы на rows (позиции >= matrix.shape[0] - новые строки в конце) за O(nnz), без перестроения с нуля
+    positions = np.asarray(positions, dtype=np.int64)
+    keep = np.ones(matrix.shape[0])
+    keep[positions[positions < matrix.shape[0]]] = 0
+    kept = (diags(keep) @ matrix).tocsr()
+    kept.resize((n_rows, matrix.shape[1]))
+    scatter = csr_matrix((np.ones(len(positions)), (positions, np.arange(len(positions)))), shape=(n_rows, len(positions)))
+    result = (kept + scatter @ rows).tocsr()
+    result.eliminate_zeros()
+    return result
+
+
+class UserNeighbors:
+    """Косинусные ближайшие соседи по строкам матрицы оценок, обученные один раз (аналог NearestNeighbors(metric='cosine', algorithm='brute'))."""
+
+    def __init__(self, normalized_matrix: csr_matrix):
+        self.normalized_matrix = normalized_matrix
+        self.normalized_matrix_t = normalized_matrix.T.tocsr()
+
+    @classmethod
+    def fit(cls, film_df_matrix: csr_matrix):
+        return cls(normalize(csr_matrix(film_df_matrix, dtype=np.float64), norm='l2', axis=1, copy=True))
+
+    def replace_rows(self, positions, rows: csr_matrix, n_rows: int):
+        normalized_matrix = replace_rows(self.normalized_matrix, positions, normalize(csr_matrix(rows, dtype=np.float64), norm='l2', axis=1), n_rows)
+        self.normalized_matrix_t = normalized_matrix.T.tocsr()
+        self.normalized_matrix = normalized_matrix
+
+    def save(self, path: str, signature: np.ndarray):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        matrix = self.normalized_matrix
+        np.savez(path, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr, shape=np.array(matrix.shape), signature=signature)
+
+    @classmethod
+    def load(cls, path: str, signature: np.ndarray):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if not np.array_equal(data['signature'], signature):
+                return None
+            return cls(csr_matrix((data['data'], data['indices'], data['indptr']), shape=tuple(data['shape'])))
+
+    @classmethod
+    def load_or_fit(cls, path: str, signature: np.ndarray, film_df_matrix: csr_matrix):
+        model = cls.load(path, signature)
+        if model is None or model.normalized_matrix.shape != film_df_matrix.shape:
+            model = cls.fit(film_df_matrix)
+            model.save(path, signature)
+        return model
+
+    def kneighbors(self, rows, n_neighbors: int):
+        # rows - индексы строк обученной матрицы, считаются все пользователи сразу одним произведением
+        rows = np.atleast_1d(np.asarray(rows))
+        similarity = (self.normalized_matrix[rows] @ self.normalized_matrix_t).toarray()
+        n_neighbors = min(n_neighbors, similarity.shape[1])
+
+        indices = np.argpartition(-similarity, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        top_similarity = np.take_along_axis(similarity, indices, axis=1)
+        order = np.argsort(-top_similarity, axis=1, kind='stable')
+        indices = np.take_along_axis(indices, order, axis=1)
+        distances = np.clip(1 - np.take_along_axis(top_similarity, order, axis=1), 0, 2)
+        return distances, indices
@@ -0,0 +1,2 @@
+from .metrics import REGISTRY, Counter, Gauge, Histogram, stage_timer, observe_stage, model_load_timer, current_rss_bytes
+from .middleware import MetricsMiddleware, instrument
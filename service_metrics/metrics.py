@@ -0,0 +1,151 @@
+import os, threading, time, resource
+from contextlib import contextmanager
+
+# Границы корзин гистограмм в секундах
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(label_names: tuple, label_values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, '') for name in self.label_names)
+
+    def samples(self) -> list:
+        # По умолчанию одна строка на набор меток; гистограмма переопределяет вывод корзинами
+        with self.lock:
+            values = dict(self.values)
+        return [f'{self.name}{format_labels(self.label_names, key)} {value}' for key, value in values.items()]
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self.key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self.key(labels)
+        with self.lock:
+            state = self.values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            # Корзины кумулятивные: значение попадает во все корзины с границей не меньше него
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> list:
+        with self.lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self.values.items()}
+        lines = []
+        for key, (counts, total, count) in values.items():
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), (*counts, count)):
+                bucket_labels = format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {bucket_count}')
+            lines.append(f'{self.name}_sum{format_labels(self.label_names, key)} {total}')
+            lines.append(f'{self.name}_count{format_labels(self.label_names, key)} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        process_memory.set(current_rss_bytes())
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Не Linux: берём пиковое значение (в Linux ru_maxrss в КБ, в macOS - в байтах)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+REGISTRY = Registry()
+http_requests = REGISTRY.register(Counter('http_requests_total', 'Количество HTTP-запросов', ('method', 'route', 'status')))
+http_duration = REGISTRY.register(Histogram('http_request_duration_seconds', 'Время обработки HTTP-запроса', ('method', 'route')))
+http_in_flight = REGISTRY.register(Gauge('http_requests_in_flight', 'Запросы, обрабатываемые в данный момент', ('method', 'route')))
+stage_duration = REGISTRY.register(Histogram('stage_duration_seconds', 'Время этапов обработки: decode, preprocess, forward, serialize', ('model', 'stage')))
+model_load_seconds = REGISTRY.register(Gauge('model_load_seconds', 'Время загрузки модели при запуске', ('model',)))
+model_memory_bytes = REGISTRY.register(Gauge('model_memory_bytes', 'Прирост RSS процесса при загрузке модели', ('model',)))
+process_memory = REGISTRY.register(Gauge('process_resident_memory_bytes', 'RSS процесса'))
+
+
+def observe_stage(model: str, stage: str, seconds: float):
+    stage_duration.observe(seconds, model=model, stage=stage)
+
+
+@contextmanager
+def stage_timer(model: str, stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(model, stage, time.perf_counter() - start)
+
+
+@contextmanager
+def model_load_timer(model: str, log=None):
+    # Время и прирост памяти при загрузке модели; пишутся в метрики и, если передан log (logger.info, print), в лог при запуске
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    memory = max(current_rss_bytes() - rss_before, 0)
+    model_load_seconds.set(seconds, model=model)
+    model_memory_bytes.set(memory, model=model)
+    if log is not None:
+        log(f'Модель {model} загружена за {seconds:.2f} с, память: +{memory / 2 ** 20:.1f} МБ')
@@ -0,0 +1,54 @@
+import time
+from starlette.responses import Response
+from starlette.routing import Match
+from .metrics import REGISTRY, http_requests, http_duration, http_in_flight
+
+
+def route_template(scope) -> str:
+    # Шаблон пути (/get_favorite_films/{user_id}), а не сам путь - иначе у метрик неограниченное число меток
+    app = scope.get('app')
+    for route in getattr(app, 'routes', []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return 'unmatched'
+
+
+class MetricsMiddleware:
+    """ASGI-мидлварь: количество и время запросов по маршрутам и число запросов в обработке."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope['method'], route_template(scope)
+        status = {'code': 500}
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        http_in_flight.inc(method=method, route=route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec(method=method, route=route)
+            http_duration.observe(time.perf_counter() - start, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=status['code'])
+
+
+def instrument(app):
+    # Общая точка подключения для всех API: мидлварь + GET /metrics в текстовом формате Prometheus
+    app.add_middleware(MetricsMiddleware)
+
+    async def metrics(request):
+        return Response(REGISTRY.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_route('/metrics', metrics, methods=['GET'], include_in_schema=False)
+    return app
@@ -1,32 +1,28 @@
-import requests, streamlit as st, logging, time
+import requests, streamlit as st, logging, sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from api_client import get_client
 
 API_BASE_URL = "http://127.0.0.1:8000/"
 
 def request_api(path_to_api: str, files: tuple):
-    trying = 3
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
     logger = logging.getLogger(__name__)
 
-    url = f"{API_BASE_URL}{path_to_api}"
-    
-    while trying > 0:
-        try:
-            response = requests.post(url, files=files)
+    # Повторы с экспоненциальной задержкой и таймауты - в общем клиенте
+    try:
+        response = get_client(API_BASE_URL).post(path_to_api, files=files)
 
-            return response.json()
+        return response.json()
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка при обращении к API\n{str(e)}")
+    except requests.exceptions.ConnectionError as e:
+        logger.error(f"Ошибка подключения к API\n{str(e)}")
 
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Ошибка подключения к API\n{str(e)}")
-        
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка\n{str(e)}")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Ошибка при обращении к API\n{str(e)}")
 
-        time.sleep(5)
-        trying -= 1
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка\n{str(e)}")
 
 def site():
     def predict_car(data):
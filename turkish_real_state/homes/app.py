@@ -1,6 +1,9 @@
 import streamlit as st
 import requests
 import pandas as pd
+import os
+import sys
+from functools import partial
 from typing import Dict, Any
 import pickle
 from pydantic import BaseModel
@@ -8,6 +11,9 @@ import numpy as np
 import warnings
 import sklearn
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from api_client import get_client
+
 API_BASE_URL = "http://localhost:8000"
 
 currency_dict = {
@@ -38,15 +44,14 @@ listing_type_mapping = {
 }
 
 
-def call_api(endpoint: str, data: Dict = None, method: str = "GET"):
+def call_api(endpoint: str, data: Dict = None, method: str = "GET", show_errors: bool = True):
     """Универсальная функция для вызова API"""
     try:
-        url = f"{API_BASE_URL}{endpoint}"
-
+        # Пул соединений, таймауты и повторы с экспоненциальной задержкой - в общем клиенте
         if method == "GET":
-            response = requests.get(url)
+            response = get_client(API_BASE_URL).get(endpoint)
         elif method == "POST":
-            response = requests.post(url, json=data)
+            response = get_client(API_BASE_URL).post(endpoint, json=data)
         else:
             return None
 
@@ -54,10 +59,12 @@ def call_api(endpoint: str, data: Dict = None, method: str = "GET"):
         return response.json()
 
     except requests.exceptions.RequestException as e:
-        st.error(f"Ошибка при обращении к API: {str(e)}")
+        if show_errors:
+            st.error(f"Ошибка при обращении к API: {str(e)}")
         return None
     except Exception as e:
-        st.error(f"Неожиданная ошибка: {str(e)}")
+        if show_errors:
+            st.error(f"Неожиданная ошибка: {str(e)}")
         return None
 
 
@@ -70,26 +77,61 @@ class RealEstateClient:
 
     def load_data(self):
         """Загрузка данных из API"""
-        self.cities = call_api("/cities") or []
-        self.districts = call_api("/districts") or []
-        self.counties = call_api("/counties") or []
-
-    def predict_price(self, features: Dict[str, Any]):
+        self.prefetch(["/cities", "/districts", "/counties"])
+        self.cities = self.lookup("/cities") or []
+        self.districts = self.lookup("/districts") or []
+        self.counties = self.lookup("/counties") or []
+
+    def session_lookups(self) -> dict:
+        if "lookups" not in st.session_state:
+            st.session_state["lookups"] = {}
+        return st.session_state["lookups"]
+
+    def prefetch(self, endpoints: list):
+        """Справочники, которых ещё нет в сессии, запрашиваются параллельно"""
+        lookups = self.session_lookups()
+        missing = [endpoint for endpoint in endpoints if endpoint not in lookups]
+        results = get_client(API_BASE_URL).gather(*[partial(call_api, endpoint, show_errors=False) for endpoint in missing])
+        for endpoint, result in zip(missing, results):
+            if result is not None:
+                lookups[endpoint] = result
+
+    def lookup(self, endpoint: str, show_errors: bool = True):
+        """Справочники не меняются во время работы, поэтому запрашиваются один раз за сессию"""
+        lookups = self.session_lookups()
+
+        if endpoint not in lookups:
+            result = call_api(endpoint, show_errors=show_errors)
+            if result is None and show_errors:
+                # Ошибка при загрузке основного справочника - повторим при следующем обновлении страницы
+                return None
+            lookups[endpoint] = result
+        return lookups[endpoint]
+
+    def counties_of(self, city_id: int):
+        """Округа города; если на сервере нет таблицы связей - все округа"""
+        return self.lookup(f"/cities/{city_id}/counties", show_errors=False) or self.counties
+
+    def districts_of(self, county_id: int):
+        """Районы округа; если на сервере нет таблицы связей - все районы"""
+        return self.lookup(f"/counties/{county_id}/districts", show_errors=False) or self.districts
+
+    def predict_price(self, features: Dict[str, Any], show_errors: bool = True):
         """Предсказание цены через API"""
-        return call_api("/predict/price", features, "POST")
+        return call_api("/predict/price", features, "POST", show_errors)
 
     def predict_subtype(self, features: Dict[str, Any]):
         """Предсказание типа через API"""
         return call_api("/predict/subtype", features, "POST")
 
-    def convert_currency(self, amount: float, from_currency: str, to_currency: str):
+    def convert_currency(self, amount: float, from_currency: str, to_currency: str, show_errors: bool = True):
         """Конвертация валюты через API"""
         data = {
             "amount": amount,
             "from_currency": from_currency,
             "to_currency": to_currency
         }
-        return call_api("/convert-currency", data, "POST")
+        return call_api("/convert-currency", data, "POST", show_errors)
 
 
 def get_common_features(client, for_price=True):
@@ -125,18 +167,20 @@ def get_common_features(client, for_price=True):
         city_id = st.selectbox("Город", options=list(city_options.keys()),
                                format_func=lambda x: city_options.get(x, f"Город {x}"))
 
-        # Районы
-        district_options = {district['district_id']: district['district_name'] for district in
-                            client.districts} if client.districts else {1: "Центральный"}
-        district_id = st.selectbox("Район", options=list(district_options.keys()),
-                                   format_func=lambda x: district_options.get(x, f"Район {x}"))
-
-        # Округи
+        # Округи выбранного города
+        city_counties = client.counties_of(city_id)
         county_options = {county['county_id']: county['county_name'] for county in
-                          client.counties} if client.counties else {1: "Центральный"}
+                          city_counties} if city_counties else {1: "Центральный"}
         county_id = st.selectbox("Округ", options=list(county_options.keys()),
                                  format_func=lambda x: county_options.get(x, f"Округ {x}"))
 
+        # Районы выбранного округа
+        county_districts = client.districts_of(county_id)
+        district_options = {district['district_id']: district['district_name'] for district in
+                            county_districts} if county_districts else {1: "Центральный"}
+        district_id = st.selectbox("Район", options=list(district_options.keys()),
+                                   format_func=lambda x: district_options.get(x, f"Район {x}"))
+
         heating_type_id = st.selectbox("Отопление",
                                        options=list(range(1, 17)),
                                        format_func=lambda x: [
@@ -236,19 +280,24 @@ def main():
         )
 
         if st.button("🎯 Предсказать цену", type="primary"):
+            prediction_currency = currency_dict[features["price_currency_id"]]
             with st.spinner("Выполняется предсказание..."):
-                result = client.predict_price(features)
+                # Валюта предсказания известна заранее: курс (конвертация 1.0) запрашивается одновременно с ценой
+                result, conversion = get_client(API_BASE_URL).gather(
+                    partial(client.predict_price, features, show_errors=False),
+                    partial(client.convert_currency, 1.0, prediction_currency, result_currency, show_errors=False)
+                )
+
+            if result is None:
+                st.error("Ошибка при обращении к API: не удалось получить предсказание")
 
             if result and "predicted_price" in result:
-                selected_currency_id = features["price_currency_id"]
-                prediction_currency = currency_dict[selected_currency_id]
                 predicted_price = result["predicted_price"]
                 listing_type = listing_type_mapping[features["listing_type"]]
 
                 # Конвертация валюты
-                conversion = client.convert_currency(predicted_price, prediction_currency, result_currency)
                 if conversion and "converted_amount" in conversion:
-                    converted_price = conversion["converted_amount"]
+                    converted_price = predicted_price * conversion["converted_amount"]
                 else:
                     converted_price = predicted_price
 
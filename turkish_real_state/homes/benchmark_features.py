@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import main
+from main import PricePredictionRequest, SubtypePredictionRequest
+
+
+def dataframe_features(request, feature_columns, defaults):
+    # Прежний путь: dict -> DataFrame из одной строки -> дозапись недостающих столбцов -> переупорядочивание
+    features = request.dict()
+    features.update(defaults)
+    input_data = pd.DataFrame([features])
+    for col in feature_columns:
+        if col not in input_data.columns:
+            input_data[col] = 0
+    return input_data[feature_columns]
+
+
+def random_requests(request_model, count: int, rng) -> list:
+    requests = []
+    for _ in range(count):
+        values = {
+            name: float(rng.uniform(30, 400)) if field.annotation is float else int(rng.integers(1, 10))
+            for name, field in request_model.model_fields.items()
+        }
+        requests.append(request_model(**values))
+    return requests
+
+
+def measure(function, requests) -> tuple[float, float]:
+    timings = []
+    for request in requests:
+        start = time.perf_counter()
+        function(request)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1e6
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description='Сборка признаков для /predict/price и /predict/subtype: DataFrame против FeatureEncoder')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    main.load_models()
+    rng = np.random.default_rng(args.seed)
+    endpoints = {
+        'price': (PricePredictionRequest, main.price_encoder, {'price': 0}, main.price_model and main.run_price_model),
+        'subtype': (SubtypePredictionRequest, main.subtype_encoder, {'sub_type_id': 1}, main.subtype_model and main.run_subtype_model)
+    }
+
+    print(f'{"эндпоинт":<10}{"путь":<26}{"p50, мкс":>10}{"p99, мкс":>10}')
+    for name, (request_model, encoder, defaults, run_model) in endpoints.items():
+        requests = random_requests(request_model, args.requests, rng)
+        paths = {
+            'dataframe': lambda request: dataframe_features(request, encoder.feature_columns, defaults),
+            'encoder': encoder.encode
+        }
+        if run_model is not None:
+            # Полный путь запроса без сети: сборка признаков + модель
+            paths['dataframe + модель'] = lambda request: run_model(dataframe_features(request, encoder.feature_columns, defaults))
+            paths['encoder + модель'] = lambda request: run_model(encoder.encode(request))
+        else:
+            print(f'{name:<10}модель не загружена, измеряется только сборка признаков')
+
+        for path, function in paths.items():
+            p50, p99 = measure(function, requests)
+            print(f'{name:<10}{path:<26}{p50:>10.1f}{p99:>10.1f}')
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+from service_metrics import observe_stage
+
+# thread - пул потоков в процессе API, process - пул процессов, в каждом из которых модели загружены заранее
+PREDICT_EXECUTOR = os.getenv('PREDICT_EXECUTOR', 'thread')
+PREDICT_WORKERS = int(os.getenv('PREDICT_WORKERS', str(os.cpu_count() or 1)))
+# Сколько предсказаний выполняется одновременно; остальные запросы ждут в очереди
+MAX_CONCURRENT_PREDICTIONS = int(os.getenv('MAX_CONCURRENT_PREDICTIONS', str(PREDICT_WORKERS)))
+# Максимальная длина очереди, после которой запросы сразу отклоняются (0 - без ограничения)
+MAX_PREDICTION_QUEUE = int(os.getenv('MAX_PREDICTION_QUEUE', '0'))
+
+
+class ExecutorBusyError(Exception):
+    pass
+
+
+class PredictionExecutor:
+    """Выполнение блокирующих предсказаний sklearn вне event loop с ограничением одновременных запросов и метриками очереди."""
+
+    def __init__(self, kind: str = PREDICT_EXECUTOR, workers: int = PREDICT_WORKERS, max_concurrent: int = MAX_CONCURRENT_PREDICTIONS,
+                 max_queue: int = MAX_PREDICTION_QUEUE, initializer=None):
+        if kind == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='predict')
+        elif kind == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+        else:
+            raise ValueError(f'Неизвестный тип пула: {kind}')
+
+        self.kind = kind
+        self.workers = workers
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_times = deque(maxlen=10000)
+        self.run_times = deque(maxlen=10000)
+
+    async def run(self, function, *args, model: str = 'default'):
+        if self.max_queue and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusyError('Server busy, try again later')
+
+        start = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.perf_counter()
+        self.wait_times.append(started - start)
+        observe_stage(model, 'queue', started - start)
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.run_times.append(time.perf_counter() - started)
+            observe_stage(model, 'forward', self.run_times[-1])
+            self.semaphore.release()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        wait_times = np.array(self.wait_times) * 1000
+        run_times = np.array(self.run_times) * 1000
+        return {
+            'executor': self.kind,
+            'workers': self.workers,
+            'max_concurrent': self.max_concurrent,
+            'running': self.running,
+            'queue_depth': self.waiting,
+            'max_queue_depth': self.max_waiting,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'queue_wait_p50_ms': float(np.percentile(wait_times, 50)) if len(wait_times) else None,
+            'queue_wait_p99_ms': float(np.percentile(wait_times, 99)) if len(wait_times) else None,
+            'predict_p50_ms': float(np.percentile(run_times, 50)) if len(run_times) else None,
+            'predict_p99_ms': float(np.percentile(run_times, 99)) if len(run_times) else None
+        }
@@ -0,0 +1,38 @@
+from operator import attrgetter
+from typing import Any, Dict, List, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+
+class FeatureEncoder:
+    """Сборка входа модели из запроса без pandas: позиции полей в feature_names_in_ вычисляются один раз при загрузке модели."""
+
+    def __init__(self, feature_columns: List[str], request_model: Type[BaseModel], defaults: Dict[str, Any]):
+        self.feature_columns = list(feature_columns)
+        # Признаки, которых нет в запросе, берутся из defaults или равны 0 - как при старой дозаписи столбцов в DataFrame
+        self.template = np.zeros(len(self.feature_columns), dtype=np.float64)
+        fields, indices = [], []
+        for idx, col in enumerate(self.feature_columns):
+            if col in defaults:
+                self.template[idx] = defaults[col]
+            elif col in request_model.model_fields:
+                fields.append(col)
+                indices.append(idx)
+
+        self.indices = np.array(indices, dtype=np.intp)
+        getter = attrgetter(*fields) if fields else (lambda request: ())
+        # attrgetter с одним полем возвращает значение, а не кортеж
+        self.getter = (lambda request: (getter(request),)) if len(fields) == 1 else getter
+
+    def encode(self, request: BaseModel) -> np.ndarray:
+        # Новый массив на каждый запрос: он передаётся в пул исполнителей и может использоваться параллельно
+        row = self.template.copy()
+        row[self.indices] = self.getter(request)
+        return row.reshape(1, -1)
+
+    def encode_batch(self, requests: List[BaseModel]) -> np.ndarray:
+        matrix = np.tile(self.template, (len(requests), 1))
+        if len(self.indices):
+            matrix[:, self.indices] = [self.getter(request) for request in requests]
+        return matrix
@@ -0,0 +1,39 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+import pandas as pd
+from fastapi import Response
+
+LOOKUP_CACHE_CONTROL = 'public, max-age=3600'
+
+
+class LookupResponse:
+    """JSON справочника, сериализованный один раз при загрузке, с ETag для условных запросов (If-None-Match)."""
+
+    def __init__(self, content):
+        self.body = json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=16).hexdigest()}"'
+        self.headers = {'ETag': self.etag, 'Cache-Control': LOOKUP_CACHE_CONTROL}
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or self.etag in tags
+
+    def respond(self, if_none_match: Optional[str] = None) -> Response:
+        if self.matches(if_none_match):
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, media_type='application/json', headers=self.headers)
+
+
+def build_children_index(hierarchy: pd.DataFrame, parent: str, child: str, children: List[dict]) -> Dict[int, LookupResponse]:
+    # Для каждого родителя (город, округ) заранее собирается ответ со списком его дочерних записей
+    children_by_id = {record[child]: record for record in children}
+    pairs = hierarchy[[parent, child]].dropna().drop_duplicates().astype(int)
+    index = {}
+    for parent_id, child_ids in pairs.groupby(parent)[child]:
+        records = [children_by_id[child_id] for child_id in sorted(child_ids) if child_id in children_by_id]
+        index[int(parent_id)] = LookupResponse(records)
+    return index
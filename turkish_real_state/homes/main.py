@@ -1,21 +1,31 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse
 import pickle
 from pydantic import BaseModel
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import warnings
 import os
 from fastapi.middleware.cors import CORSMiddleware
 
 warnings.filterwarnings('ignore')
 
-# Отключаем параллельное выполнение для избежания ошибок
-os.environ['OMP_NUM_THREADS'] = '1'
-os.environ['OPENBLAS_NUM_THREADS'] = '1'
-os.environ['MKL_NUM_THREADS'] = '1'
-os.environ['VECLIB_MAXIMUM_THREADS'] = '1'
-os.environ['NUMEXPR_NUM_THREADS'] = '1'
+# По умолчанию один поток BLAS/OpenMP на предсказание: параллельность даёт пул исполнителей (PREDICT_WORKERS),
+# значения можно переопределить переменными окружения
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('OPENBLAS_NUM_THREADS', '1')
+os.environ.setdefault('MKL_NUM_THREADS', '1')
+os.environ.setdefault('VECLIB_MAXIMUM_THREADS', '1')
+os.environ.setdefault('NUMEXPR_NUM_THREADS', '1')
+
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from service_metrics import instrument, stage_timer, model_load_timer
+from executor import PredictionExecutor, ExecutorBusyError
+from features import FeatureEncoder
+from lookups import LookupResponse, build_children_index
 
 app = FastAPI(title="Real Estate Prediction API")
 
@@ -27,6 +37,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+instrument(app)
 
 
 class PricePredictionRequest(BaseModel):
@@ -71,20 +82,30 @@ class CurrencyConversionRequest(BaseModel):
     to_currency: str
 
 
+SUBTYPE_MAPPING = {
+    1: "Квартира",
+    2: "Частные дома",
+    3: "Полное здание"
+}
+
+
 # Загрузка моделей
 price_model = None
 subtype_model = None
 price_feature_columns = None
 subtype_feature_columns = None
+price_encoder = None
+subtype_encoder = None
+prediction_executor = None
 
 
 def load_models():
-    global price_model, subtype_model, price_feature_columns, subtype_feature_columns
+    global price_model, subtype_model, price_feature_columns, subtype_feature_columns, price_encoder, subtype_encoder
 
     try:
         # Загрузка модели цены
         try:
-            with open('models/best_model_regressor.pkl', 'rb') as f:
+            with open('models/best_model_regressor.pkl', 'rb') as f, model_load_timer('price', print):
                 price_model = pickle.load(f)
             if hasattr(price_model, 'feature_names_in_'):
                 price_feature_columns = list(price_model.feature_names_in_)
@@ -98,7 +119,7 @@ def load_models():
 
         # Загрузка модели типа
         try:
-            with open('models/best_model_classification.pkl', 'rb') as f:
+            with open('models/best_model_classification.pkl', 'rb') as f, model_load_timer('subtype', print):
                 subtype_model = pickle.load(f)
             if hasattr(subtype_model, 'feature_names_in_'):
                 subtype_feature_columns = list(subtype_model.feature_names_in_)
@@ -110,18 +131,29 @@ def load_models():
                 'floor_no_id', 'tom', 'price', 'listing_type'
             ]
 
+        price_encoder = FeatureEncoder(price_feature_columns, PricePredictionRequest, {'price': 0})
+        subtype_encoder = FeatureEncoder(subtype_feature_columns, SubtypePredictionRequest, {'sub_type_id': 1})
+
     except Exception as e:
         print(f"Error loading models: {e}")
 
 
 # Загрузка данных
+# Необязательная таблица связей city_id, county_id, district_id (например, выгрузка из объявлений):
+# в справочниках df_city/df_county/df_district есть только id и название
+URL_HIERARCHY = 'df_hierarchy.csv'
+
 cities = []
 districts = []
 counties = []
+lookup_responses = {}
+counties_by_city = None
+districts_by_county = None
+EMPTY_LOOKUP = LookupResponse([])
 
 
 def load_data():
-    global cities, districts, counties
+    global cities, districts, counties, lookup_responses, counties_by_city, districts_by_county
 
     try:
         # Загрузка городов
@@ -147,15 +179,50 @@ def load_data():
     except:
         counties = []
 
+    # Ответы справочников сериализуются один раз, а не на каждый запрос
+    lookup_responses = {
+        'cities': LookupResponse(cities),
+        'districts': LookupResponse(districts),
+        'counties': LookupResponse(counties)
+    }
+
+    try:
+        hierarchy = pd.read_csv(URL_HIERARCHY)
+        counties_by_city = build_children_index(hierarchy, 'city_id', 'county_id', counties)
+        districts_by_county = build_children_index(hierarchy, 'county_id', 'district_id', districts)
+    except FileNotFoundError:
+        counties_by_city = districts_by_county = None
+    except Exception as e:
+        print(f"Error loading hierarchy: {e}")
+        counties_by_city = districts_by_county = None
+
+
+def run_price_model(input_data):
+    return price_model.predict(input_data)
+
+
+def run_subtype_model(input_data):
+    return subtype_model.predict(input_data), subtype_model.predict_proba(input_data)
+
 
 # Инициализация при запуске
 @app.on_event("startup")
 async def startup_event():
+    global prediction_executor
+
     load_models()
     load_data()
+    # В пуле процессов каждый воркер загружает модели один раз при старте
+    prediction_executor = PredictionExecutor(initializer=load_models)
     print("Models and data loaded successfully")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if prediction_executor is not None:
+        prediction_executor.shutdown()
+
+
 @app.get("/")
 async def root():
     return {"message": "Real Estate Prediction API"}
@@ -172,19 +239,38 @@ async def health_check():
     }
 
 
+@app.get("/stats")
+async def stats():
+    return prediction_executor.stats() if prediction_executor is not None else {}
+
+
 @app.get("/cities")
-async def get_cities():
-    return cities
+async def get_cities(if_none_match: Optional[str] = Header(None)):
+    return lookup_responses['cities'].respond(if_none_match)
 
 
 @app.get("/districts")
-async def get_districts():
-    return districts
+async def get_districts(if_none_match: Optional[str] = Header(None)):
+    return lookup_responses['districts'].respond(if_none_match)
 
 
 @app.get("/counties")
-async def get_counties():
-    return counties
+async def get_counties(if_none_match: Optional[str] = Header(None)):
+    return lookup_responses['counties'].respond(if_none_match)
+
+
+@app.get("/cities/{city_id}/counties")
+async def get_city_counties(city_id: int, if_none_match: Optional[str] = Header(None)):
+    if counties_by_city is None:
+        return JSONResponse(status_code=404, content={"error": f"Hierarchy file {URL_HIERARCHY} not loaded"})
+    return counties_by_city.get(city_id, EMPTY_LOOKUP).respond(if_none_match)
+
+
+@app.get("/counties/{county_id}/districts")
+async def get_county_districts(county_id: int, if_none_match: Optional[str] = Header(None)):
+    if districts_by_county is None:
+        return JSONResponse(status_code=404, content={"error": f"Hierarchy file {URL_HIERARCHY} not loaded"})
+    return districts_by_county.get(county_id, EMPTY_LOOKUP).respond(if_none_match)
 
 
 @app.post("/predict/price")
@@ -193,17 +279,9 @@ async def predict_price(request: PricePredictionRequest):
         return {"error": "Price model not loaded"}
 
     try:
-        features = request.dict()
-        features['price'] = 0  # Добавляем цену для совместимости
-
-        input_data = pd.DataFrame([features])
-
-        for col in price_feature_columns:
-            if col not in input_data.columns:
-                input_data[col] = 0
-
-        input_data = input_data[price_feature_columns]
-        prediction = price_model.predict(input_data)[0]
+        with stage_timer('price', 'preprocess'):
+            input_data = price_encoder.encode(request)
+        prediction = (await prediction_executor.run(run_price_model, input_data, model='price'))[0]
 
         return {
             "predicted_price": float(prediction),
@@ -211,6 +289,8 @@ async def predict_price(request: PricePredictionRequest):
             "listing_type": request.listing_type
         }
 
+    except ExecutorBusyError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         return {"error": f"Prediction error: {str(e)}"}
 
@@ -221,33 +301,75 @@ async def predict_subtype(request: SubtypePredictionRequest):
         return {"error": "Subtype model not loaded"}
 
     try:
-        features = request.dict()
-        features['sub_type_id'] = 1
+        with stage_timer('subtype', 'preprocess'):
+            input_data = subtype_encoder.encode(request)
+        predictions, probabilities = await prediction_executor.run(run_subtype_model, input_data, model='subtype')
+        prediction = predictions[0]
+        confidence = max(probabilities[0])
 
-        input_data = pd.DataFrame([features])
+        return {
+            "predicted_subtype": SUBTYPE_MAPPING.get(prediction, "Неизвестно"),
+            "confidence": float(confidence),
+            "listing_type": request.listing_type
+        }
 
-        for col in subtype_feature_columns:
-            if col not in input_data.columns:
-                input_data[col] = 0
+    except ExecutorBusyError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
+    except Exception as e:
+        return {"error": f"Prediction error: {str(e)}"}
 
-        input_data = input_data[subtype_feature_columns]
 
-        prediction = subtype_model.predict(input_data)[0]
-        probabilities = subtype_model.predict_proba(input_data)[0]
-        confidence = max(probabilities)
+@app.post("/predict/price/batch")
+async def predict_price_batch(requests: List[PricePredictionRequest]):
+    if price_model is None:
+        return {"error": "Price model not loaded"}
+    if not requests:
+        return []
 
-        subtype_mapping = {
-            1: "Квартира",
-            2: "Частные дома",
-            3: "Полное здание"
-        }
+    try:
+        with stage_timer('price', 'preprocess'):
+            input_data = price_encoder.encode_batch(requests)
+        predictions = await prediction_executor.run(run_price_model, input_data, model='price')
+
+        return [
+            {
+                "predicted_price": float(prediction),
+                "currency_id": request.price_currency_id,
+                "listing_type": request.listing_type
+            }
+            for request, prediction in zip(requests, predictions)
+        ]
+
+    except ExecutorBusyError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
+    except Exception as e:
+        return {"error": f"Prediction error: {str(e)}"}
 
-        return {
-            "predicted_subtype": subtype_mapping.get(prediction, "Неизвестно"),
-            "confidence": float(confidence),
-            "listing_type": request.listing_type
-        }
 
+@app.post("/predict/subtype/batch")
+async def predict_subtype_batch(requests: List[SubtypePredictionRequest]):
+    if subtype_model is None:
+        return {"error": "Subtype model not loaded"}
+    if not requests:
+        return []
+
+    try:
+        with stage_timer('subtype', 'preprocess'):
+            input_data = subtype_encoder.encode_batch(requests)
+        predictions, probabilities = await prediction_executor.run(run_subtype_model, input_data, model='subtype')
+        confidences = probabilities.max(axis=1)
+
+        return [
+            {
+                "predicted_subtype": SUBTYPE_MAPPING.get(prediction, "Неизвестно"),
+                "confidence": float(confidence),
+                "listing_type": request.listing_type
+            }
+            for request, prediction, confidence in zip(requests, predictions.tolist(), confidences)
+        ]
+
+    except ExecutorBusyError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         return {"error": f"Prediction error: {str(e)}"}
 